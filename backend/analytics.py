@@ -0,0 +1,207 @@
+"""Daily maintenance rollups backing the analytics API.
+
+Rather than scanning maintenance_requests for every report, each request
+contributes to a few pre-aggregated documents in `request_rollups`, one per
+(day, team, equipment, category), also carrying its month and year:
+
+    created, corrective, preventive, other_type
+                      counted on the day the request was created
+    repaired, scrapped, resolution_seconds, repair_hours, repair_hours_count
+                      counted on the day it was closed (closed_at)
+
+request_contributions() is the single definition of what a request adds.
+Writes keep the rollups current by applying contributions(after) minus
+contributions(before) with one bulk_write of $inc upserts; rebuild_rollups()
+recomputes everything from scratch with the same function.
+
+Rollups are keyed by the equipment_category copied onto each request. When
+an asset's category changes, propagation.py rewrites that copy on its
+requests and moves each rewritten request's contribution from the old
+category's buckets to the new one in the same pass, so history follows the
+asset into its new category without a rebuild.
+
+Analytics queries then only aggregate rollup documents, whose count grows
+with days x assets touched rather than with requests.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTION = "request_rollups"
+CLOSED_STAGES = {"repaired": "repaired", "scrap": "scrapped"}
+REQUEST_TYPES = ("corrective", "preventive")
+METRIC_FIELDS = (
+    "created", "corrective", "preventive", "other_type",
+    "repaired", "scrapped", "resolution_seconds", "repair_hours", "repair_hours_count",
+)
+# request fields request_contributions() reads
+CONTRIBUTION_PROJECTION = {"_id": 0, "created_at": 1, "closed_at": 1, "updated_at": 1, "stage": 1, "request_type": 1,
+                           "duration": 1, "team_id": 1, "equipment_id": 1, "equipment_category": 1}
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _bucket(day: datetime, doc: dict) -> tuple:
+    return (
+        day.astimezone(timezone.utc).date().isoformat(),
+        doc.get("team_id"),
+        doc.get("equipment_id"),
+        doc.get("equipment_category"),
+    )
+
+
+def request_contributions(doc: dict) -> Dict[tuple, Dict[str, float]]:
+    """What one request, in its current state, adds to each rollup bucket."""
+    contributions = defaultdict(lambda: defaultdict(int))
+    created_at = _as_datetime(doc.get("created_at"))
+    if created_at is None:
+        return {}
+    created = contributions[_bucket(created_at, doc)]
+    created["created"] += 1
+    request_type = doc.get("request_type")
+    created[request_type if request_type in REQUEST_TYPES else "other_type"] += 1
+
+    closed_field = CLOSED_STAGES.get(doc.get("stage"))
+    if closed_field:
+        # imported or pre-rollup history has no closed_at; its last update is the best guess
+        closed_at = _as_datetime(doc.get("closed_at") or doc.get("updated_at")) or created_at
+        closed = contributions[_bucket(closed_at, doc)]
+        closed[closed_field] += 1
+        closed["resolution_seconds"] += max(0.0, (closed_at - created_at).total_seconds())
+        if closed_field == "repaired" and doc.get("duration") is not None:
+            closed["repair_hours"] += doc["duration"]
+            closed["repair_hours_count"] += 1
+    return contributions
+
+
+def rollup_delta(before: Optional[dict], after: Optional[dict]) -> Dict[tuple, Dict[str, float]]:
+    """Change in rollups when a request goes from `before` to `after` (None = absent)."""
+    delta = defaultdict(lambda: defaultdict(int))
+    for doc, sign in ((after, 1), (before, -1)):
+        if doc is None:
+            continue
+        for key, values in request_contributions(doc).items():
+            for field, value in values.items():
+                delta[key][field] += sign * value
+    return {
+        key: {field: value for field, value in values.items() if value}
+        for key, values in delta.items()
+        if any(values.values())
+    }
+
+
+def merge_deltas(deltas: Iterable[dict]) -> dict:
+    merged = defaultdict(lambda: defaultdict(int))
+    for delta in deltas:
+        for key, values in delta.items():
+            for field, value in values.items():
+                merged[key][field] += value
+    return merged
+
+
+def _rollup_id(key: tuple) -> str:
+    return "|".join("" if part is None else str(part) for part in key)
+
+
+def _operations(delta: dict):
+    for key, values in delta.items():
+        day, team_id, equipment_id, category = key
+        yield UpdateOne(
+            {"_id": _rollup_id(key)},
+            {
+                "$inc": dict(values),
+                "$setOnInsert": {"day": day, "month": day[:7], "year": day[:4], "team_id": team_id,
+                                 "equipment_id": equipment_id, "equipment_category": category},
+            },
+            upsert=True,
+        )
+
+
+async def apply_rollup_delta(db, delta: dict, collection: str = ROLLUP_COLLECTION):
+    """Apply a delta with one unordered bulk_write; failures are logged, never raised."""
+    operations = list(_operations(delta))
+    if not operations:
+        return
+    try:
+        await db[collection].bulk_write(operations, ordered=False)
+    except Exception:
+        # analytics must never fail the write that fed it; a rebuild repairs drift
+        logger.exception("Rollup update failed", extra={"buckets": len(operations)})
+
+
+async def rebuild_rollups(db, batch_size: int = 5000, progress=None) -> int:
+    """Recompute every rollup from maintenance_requests into a fresh collection and swap it in.
+
+    Writes that land while the rebuild runs go to the old collection and are
+    lost on the swap, so run it when request traffic is quiet.
+    """
+    staging = f"{ROLLUP_COLLECTION}_rebuild"
+    await db[staging].drop()
+    pending = defaultdict(lambda: defaultdict(int))
+    scanned = 0
+    async for doc in db.maintenance_requests.find({}, CONTRIBUTION_PROJECTION).batch_size(batch_size):
+        for key, values in request_contributions(doc).items():
+            for field, value in values.items():
+                pending[key][field] += value
+        scanned += 1
+        if scanned % batch_size == 0:
+            await db[staging].bulk_write(list(_operations(pending)), ordered=False)
+            pending.clear()
+            if progress is not None:
+                progress(scanned)
+    if pending:
+        await db[staging].bulk_write(list(_operations(pending)), ordered=False)
+    if progress is not None:
+        progress(scanned)
+
+    if scanned:
+        await db[staging].rename(ROLLUP_COLLECTION, dropTarget=True)
+    else:
+        await db[ROLLUP_COLLECTION].delete_many({})
+    return scanned
+
+
+def analytics_pipeline(match: dict, group_by: Optional[str], bucket: str) -> list:
+    """Aggregate rollups into rows keyed by date bucket and optional dimension."""
+    if bucket in ("day", "month", "year"):
+        period = f"${bucket}"
+    elif bucket == "week":
+        period = {"$dateToString": {"format": "%G-W%V", "date": {"$dateFromString": {"dateString": "$day"}}}}
+    else:
+        period = None
+
+    group_id = {}
+    if period is not None:
+        group_id["period"] = period
+    if group_by:
+        group_id[group_by] = f"${group_by}"
+
+    return [
+        {"$match": match},
+        {"$group": {"_id": group_id, **{field: {"$sum": f"${field}"} for field in METRIC_FIELDS}}},
+        {"$sort": {"_id": 1}},
+    ]
+
+
+def finish_row(row: dict) -> dict:
+    """Turn summed counters into the reported metrics."""
+    closed = row.get("repaired", 0) + row.get("scrapped", 0)
+    result = {**row.pop("_id", {}), **row}
+    result["closed"] = closed
+    result["mttr_hours"] = round(row["resolution_seconds"] / closed / 3600, 2) if closed else None
+    result["avg_repair_hours"] = (
+        round(row["repair_hours"] / row["repair_hours_count"], 2) if row.get("repair_hours_count") else None
+    )
+    result["repair_ratio"] = round(row["repaired"] / closed, 4) if closed else None
+    return result
@@ -0,0 +1,179 @@
+"""Incremental NDJSON / CSV handling for the bulk import and export endpoints.
+
+Request bodies are consumed chunk by chunk and turned into one record at a
+time, so memory stays flat no matter how large the upload is; only the
+current line (or CSV record) is ever buffered. Exports work the same way in
+reverse: documents are encoded one cursor batch at a time.
+"""
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence, Tuple, Union
+
+from pydantic import ValidationError
+
+FORMATS = ("ndjson", "csv")
+
+# a single line longer than this means the body is not line-delimited at all
+MAX_LINE_BYTES = 1024 * 1024
+
+
+def detect_format(content_type: Optional[str], explicit: Optional[str] = None) -> str:
+    """Pick ndjson or csv from an explicit ?format= or the Content-Type header."""
+    if explicit:
+        fmt = explicit.lower()
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format {explicit!r}; use one of {', '.join(FORMATS)}")
+        return fmt
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    return "ndjson"
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Yield decoded lines (without line endings) from a stream of byte chunks."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+        if len(pending) > MAX_LINE_BYTES:
+            raise ValueError(f"Line longer than {MAX_LINE_BYTES} bytes")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, Union[dict, ValueError]]]:
+    """Yield (row_number, record) pairs; unparseable rows yield a ValueError instead.
+
+    Row numbers are 1-based data rows (the CSV header is not counted).
+    """
+    if fmt == "csv":
+        async for item in _iter_csv(chunks):
+            yield item
+        return
+
+    row_number = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row_number, ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield row_number, ValueError("Expected a JSON object")
+            continue
+        yield row_number, record
+
+
+async def _iter_csv(chunks: AsyncIterator[bytes]):
+    header = None
+    row_number = 0
+    record_lines = []
+    async for line in iter_lines(chunks):
+        record_lines.append(line)
+        # a quoted field may contain newlines; wait until quotes balance
+        if sum(part.count('"') for part in record_lines) % 2:
+            if sum(len(part) for part in record_lines) > MAX_LINE_BYTES:
+                raise ValueError(f"CSV record longer than {MAX_LINE_BYTES} bytes")
+            continue
+        text = "\n".join(record_lines)
+        record_lines = []
+        if not text.strip():
+            continue
+
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        # empty cells mean "not provided" so model defaults apply
+        yield row_number, {name: value for name, value in zip(header, values) if value != ""}
+
+    if record_lines:
+        yield row_number + 1, ValueError("Unterminated quoted field at end of input")
+
+
+def format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in error.errors()
+    )
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=str)
+    return value
+
+
+async def encode_records(cursor, fmt: str, fields: Sequence[str], batch_size: int) -> AsyncIterator[bytes]:
+    """Encode documents from a Mongo cursor as NDJSON or CSV, one batch per chunk."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        yield buffer.getvalue().encode()
+
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield _encode_batch(batch, fmt, fields)
+            batch = []
+    if batch:
+        yield _encode_batch(batch, fmt, fields)
+
+
+def _encode_batch(docs: list, fmt: str, fields: Sequence[str]) -> bytes:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for doc in docs:
+            writer.writerow(["" if doc.get(f) is None else _encode_value(doc.get(f)) for f in fields])
+        return buffer.getvalue().encode()
+    lines = [json.dumps({f: _encode_value(doc.get(f)) for f in fields}) for doc in docs]
+    return ("\n".join(lines) + "\n").encode()
+
+
+class ImportReport:
+    """Running totals for one import; keeps at most `max_errors` row errors."""
+
+    def __init__(self, max_errors: int = 1000):
+        self.max_errors = max_errors
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self.aborted: Optional[str] = None
+
+    def error(self, row: int, message: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "error": message})
+
+    def as_dict(self) -> dict:
+        report = {
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+        if self.aborted:
+            report["aborted"] = self.aborted
+        return report
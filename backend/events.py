@@ -0,0 +1,103 @@
+"""In-process pub/sub feeding the server-sent events stream.
+
+Handlers publish after their writes succeed; every open /api/events
+connection holds one Subscription with a small bounded queue. Publishing
+never waits on a subscriber: if a client falls behind and its queue fills,
+further events for it are dropped and it is sent a single `resync` event
+telling it to refetch, so one slow connection cannot hold up the rest.
+An idle subscription costs one queue and one parked task.
+"""
+import asyncio
+import itertools
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def format_sse(event: str, data, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    payload = json.dumps(data, default=_json_default)
+    lines.append(f"data: {payload}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    def __init__(self, user_id: str, queue_size: int):
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.lagged = False
+
+    def offer(self, message: str) -> bool:
+        if self.lagged:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.lagged = True
+            return False
+
+    async def next_message(self, timeout: float) -> Optional[str]:
+        """Next event to send, a resync notice after overflow, or None on idle timeout."""
+        if self.lagged and self.queue.empty():
+            self.lagged = False
+            return format_sse("resync", {"reason": "events dropped, refetch state"})
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._by_user: Dict[str, Set[Subscription]] = {}
+        self._all: Set[Subscription] = set()
+        self._ids = itertools.count(1)
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, user_id: str) -> Subscription:
+        subscription = Subscription(user_id, self.queue_size)
+        self._by_user.setdefault(user_id, set()).add(subscription)
+        self._all.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._all.discard(subscription)
+        subscribers = self._by_user.get(subscription.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._by_user[subscription.user_id]
+
+    def publish(self, event: str, data, recipients: Optional[Iterable[str]] = None):
+        """Send `event` to every connection of `recipients`, or to everyone when None."""
+        if recipients is None:
+            targets = self._all
+        else:
+            targets = [sub for user_id in set(recipients) for sub in self._by_user.get(user_id, ())]
+        if not targets:
+            return
+        message = format_sse(event, data, next(self._ids))
+        self.published += 1
+        for subscription in targets:
+            if not subscription.offer(message):
+                self.dropped += 1
+
+    def stats(self) -> dict:
+        return {
+            "connections": len(self._all),
+            "users": len(self._by_user),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,220 @@
+"""MongoDB index declarations for GearGuard.
+
+Every lookup server.py performs should be backed by one of the indexes
+declared in INDEX_SPEC. The app builds missing indexes on startup; the same
+code can be run ahead of a deploy so large collections are indexed before
+new code starts querying them:
+
+    python indexes.py            # build missing indexes, then report drift
+    python indexes.py --check    # only report drift, exit 1 if any
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# collection name -> indexes the API relies on
+INDEX_SPEC: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_id"),
+    ],
+    "equipment": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_id"),
+        # /search: anchored serial_number prefixes, and words in name/serial/location
+        IndexModel([("serial_number", ASCENDING)], name="serial_number"),
+        # maintenance plans targeting a whole category
+        IndexModel([("category", ASCENDING)], name="category"),
+        IndexModel(
+            [("name", TEXT), ("serial_number", TEXT), ("location", TEXT), ("category", TEXT)],
+            name="search_text",
+            weights={"name": 10, "serial_number": 8, "location": 3, "category": 2},
+        ),
+    ],
+    "teams": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_id"),
+    ],
+    "maintenance_requests": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_id"),
+        IndexModel(
+            [("equipment_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="equipment_created_id",
+        ),
+        IndexModel(
+            [("stage", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="stage_created_id",
+        ),
+        IndexModel(
+            [("request_type", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="type_created_id",
+        ),
+        IndexModel(
+            [("team_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="team_created_id",
+        ),
+        IndexModel(
+            [("assigned_to", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+            name="assignee_created_id",
+        ),
+        # calendar view: preventive requests within a scheduled_date window
+        IndexModel([("request_type", ASCENDING), ("scheduled_date", ASCENDING)], name="type_scheduled"),
+        IndexModel([("scheduled_date", ASCENDING)], name="scheduled_date"),
+        IndexModel(
+            [("subject", TEXT), ("equipment_name", TEXT), ("description", TEXT)],
+            name="search_text",
+            weights={"subject": 10, "equipment_name": 4, "description": 1},
+        ),
+        # idempotency key for requests generated from maintenance plans
+        IndexModel(
+            [("plan_key", ASCENDING)], name="plan_key_unique", unique=True,
+            partialFilterExpression={"plan_key": {"$exists": True}},
+        ),
+    ],
+    "notifications": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("recipient_id", ASCENDING), ("created_at", DESCENDING)], name="recipient_created"),
+        IndexModel([("recipient_id", ASCENDING), ("is_read", ASCENDING)], name="recipient_read"),
+        # read notifications are deleted at expire_at (read time + NOTIFICATION_RETENTION_DAYS)
+        IndexModel([("expire_at", ASCENDING)], name="expire_at_ttl", expireAfterSeconds=0),
+    ],
+    # analytics rollups are keyed by a "day|team|equipment|category" _id
+    "request_rollups": [
+        IndexModel([("day", ASCENDING)], name="day"),
+        IndexModel([("team_id", ASCENDING), ("day", ASCENDING)], name="team_day"),
+        IndexModel([("equipment_category", ASCENDING), ("day", ASCENDING)], name="category_day"),
+        IndexModel([("equipment_id", ASCENDING), ("day", ASCENDING)], name="equipment_day"),
+    ],
+    "maintenance_plans": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_id"),
+        IndexModel([("equipment_id", ASCENDING)], name="equipment_id"),
+        IndexModel([("category", ASCENDING)], name="category"),
+        IndexModel([("active", ASCENDING), ("next_due", ASCENDING)], name="active_next_due"),
+    ],
+    "propagation_jobs": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("source_id", ASCENDING), ("created_at", DESCENDING)], name="source_created"),
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created"),
+    ],
+}
+
+# index options that change behaviour and therefore count as drift
+_COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def _normalize(index_doc: dict) -> dict:
+    """Reduce an index description to the parts we compare for drift."""
+    key = index_doc["key"]
+    key = list(key.items()) if hasattr(key, "items") else list(key)
+    normalized = {}
+    # the server reports a text index as _fts/_ftsx keys plus per-field weights
+    text_fields = {field: 1 for field, direction in key if direction == "text" and field != "_fts"}
+    if any(direction == "text" for _, direction in key):
+        weights = {**text_fields, **(index_doc.get("weights") or {})}
+        normalized["weights"] = sorted(weights.items())
+        key = [(field, direction) for field, direction in key
+               if direction != "text" and field not in ("_fts", "_ftsx")]
+    normalized["key"] = [(field, direction) for field, direction in key]
+    for option in _COMPARED_OPTIONS:
+        value = index_doc.get(option)
+        # expireAfterSeconds=0 (expire at the stored date) is still a TTL index
+        if value or (option == "expireAfterSeconds" and value is not None):
+            normalized[option] = value
+    return normalized
+
+
+async def index_drift(db) -> Dict[str, Dict[str, List[str]]]:
+    """Compare the live indexes against INDEX_SPEC.
+
+    Returns {collection: {"missing": [...], "mismatched": [...], "extra": [...]}}
+    for every collection that differs from the declared spec.
+    """
+    drift = {}
+    for collection, models in INDEX_SPEC.items():
+        existing = await db[collection].index_information()
+        existing.pop("_id_", None)
+
+        missing, mismatched = [], []
+        for model in models:
+            wanted = model.document
+            name = wanted["name"]
+            if name not in existing:
+                missing.append(name)
+            elif _normalize(existing[name]) != _normalize(wanted):
+                mismatched.append(name)
+
+        declared = {model.document["name"] for model in models}
+        extra = sorted(name for name in existing if name not in declared)
+
+        if missing or mismatched or extra:
+            drift[collection] = {"missing": missing, "mismatched": mismatched, "extra": extra}
+    return drift
+
+
+async def ensure_indexes(db) -> Dict[str, Dict[str, List[str]]]:
+    """Build any declared index that does not exist yet and return the remaining drift.
+
+    Mismatched and extra indexes are only reported; dropping or rebuilding an
+    index on a large collection is left to an operator.
+    """
+    for collection, models in INDEX_SPEC.items():
+        existing = await db[collection].index_information()
+        to_create = [model for model in models if model.document["name"] not in existing]
+        if not to_create:
+            continue
+        try:
+            created = await db[collection].create_indexes(to_create)
+            logger.info("Created indexes on %s: %s", collection, ", ".join(created))
+        except OperationFailure as e:
+            # e.g. duplicate emails blocking a unique index; keep the app up
+            logger.error("Failed to create indexes on %s: %s", collection, e)
+
+    drift = await index_drift(db)
+    for collection, problems in drift.items():
+        logger.warning("Index drift on %s: %s", collection, problems)
+    return drift
+
+
+async def _main(check_only: bool) -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        if check_only:
+            drift = await index_drift(db)
+        else:
+            drift = await ensure_indexes(db)
+    finally:
+        client.close()
+
+    if not drift:
+        print("Indexes match the declared spec.")
+        return 0
+    for collection, problems in drift.items():
+        for kind, names in problems.items():
+            if names:
+                print(f"{collection}: {kind}: {', '.join(names)}")
+    return 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or check GearGuard MongoDB indexes.")
+    parser.add_argument("--check", action="store_true", help="only report drift, do not build anything")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    sys.exit(asyncio.run(_main(args.check)))
@@ -0,0 +1,148 @@
+"""Structured logging for GearGuard.
+
+configure_logging() routes every record through a QueueHandler, so the code
+that logs only pays for an in-memory put; a QueueListener thread formats the
+records as one JSON object per line and writes them out. Each record carries
+the id of the HTTP request that produced it (see RequestIdMiddleware).
+
+Environment:
+    LOG_LEVEL              root level, default INFO
+    LOG_LEVELS             per-logger overrides, e.g. "mailer=DEBUG,server=WARNING"
+    LOG_DEBUG_SAMPLE_RATE  fraction of DEBUG records kept, default 1.0
+"""
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from datetime import datetime, timezone
+
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp the current request id on the record while still in the caller's context."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """Keep only `rate` of DEBUG records; other levels always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Resolve the message now, while args still hold their current values,
+        # but keep exc_info so the listener can render it as a separate field.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestIdMiddleware:
+    """ASGI middleware that assigns each HTTP request an id for log correlation.
+
+    An incoming X-Request-ID header is reused; otherwise a new id is generated.
+    The id is echoed back on the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
+
+
+_listener = None
+
+
+def configure_logging():
+    """Install the queue-backed JSON pipeline on the root logger. Safe to call twice."""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JSONFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(DebugSampler(float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", 1.0))))
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+    for override in filter(None, os.environ.get("LOG_LEVELS", "").split(",")):
+        name, _, level = override.partition("=")
+        logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records; call on application shutdown."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
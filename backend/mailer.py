@@ -0,0 +1,322 @@
+"""Background email delivery for GearGuard.
+
+Handlers call EmailDeliveryWorker.enqueue(), which only appends to an
+in-memory queue. A small set of consumer tasks drain the queue over a pool
+of persistent SMTP connections: bursts are batched onto one connection,
+identical messages are coalesced into a single send, and transient failures
+are retried with exponential backoff.
+
+To try it against a local stand-in server:
+
+    python -m aiosmtpd -n -l localhost:8025
+    SMTP_SERVER=localhost SMTP_PORT=8025 SMTP_STARTTLS=false SMTP_USER=gearguard@localhost \
+        uvicorn server:app
+"""
+import asyncio
+import logging
+import smtplib
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _smtp_error_fields(e: Exception) -> dict:
+    """Log fields for an SMTP failure: its type, reply codes and refused-recipient count.
+
+    The exception text is left out on purpose. SMTPRecipientsRefused renders
+    as the dict of refused addresses, and server replies often echo them.
+    """
+    fields = {"error": type(e).__name__}
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        fields["refused_recipients"] = len(e.recipients)
+        fields["smtp_codes"] = sorted({code for code, _ in e.recipients.values()})
+    elif isinstance(e, smtplib.SMTPResponseException):
+        fields["smtp_codes"] = [e.smtp_code]
+    return fields
+
+
+@dataclass
+class OutgoingEmail:
+    recipients: List[str]
+    subject: str
+    body: str
+    attempts: int = 0
+    # set once coalescing adds recipients from another message; they then go in the envelope only
+    undisclosed: bool = False
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class SMTPConnectionPool:
+    """Keeps up to `size` logged-in SMTP connections open between batches.
+
+    smtplib is blocking, so connecting and health checks run in a thread.
+    A connection idle for longer than `max_idle` is probed with NOOP before
+    reuse and replaced if the server has dropped it.
+    """
+
+    def __init__(self, host: str, port: int, username: Optional[str], password: Optional[str],
+                 starttls: bool = True, size: int = 2, timeout: float = 30.0, max_idle: float = 60.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._slots = asyncio.Semaphore(size)
+        self._idle = []  # [(connection, last_used)]
+        self.connects = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            conn.starttls()
+        if self.username and self.password:
+            conn.login(self.username, self.password)
+        self.connects += 1
+        return conn
+
+    @staticmethod
+    def _is_alive(conn: smtplib.SMTP) -> bool:
+        try:
+            return conn.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @staticmethod
+    def _quit(conn: smtplib.SMTP):
+        try:
+            conn.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.close()
+
+    async def acquire(self) -> smtplib.SMTP:
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                conn, last_used = self._idle.pop()
+                if time.monotonic() - last_used < self.max_idle:
+                    return conn
+                if await asyncio.to_thread(self._is_alive, conn):
+                    return conn
+                await asyncio.to_thread(self._quit, conn)
+            return await asyncio.to_thread(self._connect)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, conn: smtplib.SMTP, broken: bool = False):
+        try:
+            if broken:
+                await asyncio.to_thread(self._quit, conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    async def close(self):
+        while self._idle:
+            conn, _ = self._idle.pop()
+            await asyncio.to_thread(self._quit, conn)
+
+
+class EmailDeliveryWorker:
+    def __init__(self, pool: SMTPConnectionPool, sender: str, workers: int = 2, queue_size: int = 10000,
+                 batch_size: int = 50, linger: float = 0.05, max_retries: int = 5,
+                 backoff_base: float = 1.0, backoff_max: float = 60.0):
+        self.pool = pool
+        self.sender = sender
+        self.workers = workers
+        self.batch_size = batch_size
+        self.linger = linger
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._tasks = []
+        self._retry_handles = set()
+        self._started_at = None
+        self._latencies = deque(maxlen=1000)
+        self.counters = {
+            "enqueued": 0, "sent": 0, "coalesced": 0, "retried": 0,
+            "failed": 0, "dropped": 0, "batches": 0,
+        }
+
+    # -- lifecycle -----------------------------------------------------------
+    async def start(self):
+        self._started_at = time.monotonic()
+        self._tasks = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Give queued mail `drain_timeout` seconds to go out, then shut down."""
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Email worker stopped with %d messages still queued", self._queue.qsize())
+        for handle in self._retry_handles:
+            handle.cancel()
+        if self._retry_handles:
+            logger.warning("Email worker dropped %d scheduled retries on shutdown", len(self._retry_handles))
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.pool.close()
+
+    # -- producer side -------------------------------------------------------
+    def enqueue(self, recipients: List[str], subject: str, body: str) -> bool:
+        """Queue a message without blocking; returns False if the queue is full."""
+        if not recipients:
+            return False
+        try:
+            self._queue.put_nowait(OutgoingEmail(list(recipients), subject, body))
+        except asyncio.QueueFull:
+            self.counters["dropped"] += 1
+            logger.error("Email queue full, dropping message %r", subject)
+            return False
+        self.counters["enqueued"] += 1
+        return True
+
+    # -- consumer side -------------------------------------------------------
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # linger briefly so a burst (e.g. a team fan-out) shares one connection
+            deadline = loop.time() + self.linger
+            while len(batch) < self.batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._deliver(batch)
+            except Exception:
+                logger.exception("Unexpected error delivering email batch")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _coalesce(self, batch: List[OutgoingEmail]) -> List[OutgoingEmail]:
+        """Merge messages with the same subject and body into one send.
+
+        The merged recipients travel in the SMTP envelope only; a merged
+        message is addressed to "undisclosed-recipients" so nobody learns
+        who else received the same notification.
+        """
+        merged = OrderedDict()
+        for email in batch:
+            key = (email.subject, email.body)
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = email
+                continue
+            for recipient in email.recipients:
+                if recipient not in existing.recipients:
+                    existing.recipients.append(recipient)
+                    existing.undisclosed = True
+            existing.enqueued_at = min(existing.enqueued_at, email.enqueued_at)
+            existing.attempts = max(existing.attempts, email.attempts)
+            self.counters["coalesced"] += 1
+        return list(merged.values())
+
+    def _build(self, email: OutgoingEmail) -> str:
+        msg = MIMEMultipart()
+        msg['From'] = self.sender
+        msg['Subject'] = email.subject
+        msg['To'] = "undisclosed-recipients:;" if email.undisclosed else ", ".join(email.recipients)
+        msg.attach(MIMEText(email.body, 'plain'))
+        return msg.as_string()
+
+    async def _deliver(self, batch: List[OutgoingEmail]):
+        emails = self._coalesce(batch)
+        self.counters["batches"] += 1
+        try:
+            conn = await self.pool.acquire()
+        except (smtplib.SMTPException, OSError) as e:
+            logger.warning("SMTP connect failed", extra=_smtp_error_fields(e))
+            for email in emails:
+                self._retry(email)
+            return
+
+        broken = False
+        try:
+            for index, email in enumerate(emails):
+                try:
+                    await asyncio.to_thread(conn.sendmail, self.sender, email.recipients, self._build(email))
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                    code = getattr(e, "smtp_code", 0)
+                    if isinstance(e, smtplib.SMTPRecipientsRefused) or code >= 500:
+                        # permanent rejection; retrying won't help
+                        self.counters["failed"] += 1
+                        logger.error("SMTP rejected %r", email.subject, extra={
+                            **_smtp_error_fields(e), "recipients": len(email.recipients),
+                        })
+                        continue
+                    broken = True
+                    logger.warning("SMTP error, will retry", extra=_smtp_error_fields(e))
+                    for pending in emails[index:]:
+                        self._retry(pending)
+                    break
+                except (smtplib.SMTPException, OSError) as e:
+                    broken = True
+                    logger.warning("SMTP connection lost, will retry", extra=_smtp_error_fields(e))
+                    for pending in emails[index:]:
+                        self._retry(pending)
+                    break
+                else:
+                    self.counters["sent"] += 1
+                    self._latencies.append(time.monotonic() - email.enqueued_at)
+        finally:
+            await self.pool.release(conn, broken=broken)
+
+    def _retry(self, email: OutgoingEmail):
+        email.attempts += 1
+        if email.attempts > self.max_retries:
+            self.counters["failed"] += 1
+            logger.error("Giving up on email %r after %d attempts", email.subject, email.attempts)
+            return
+        self.counters["retried"] += 1
+        delay = min(self.backoff_base * 2 ** (email.attempts - 1), self.backoff_max)
+        handle = None
+
+        def requeue():
+            self._retry_handles.discard(handle)
+            try:
+                self._queue.put_nowait(email)
+            except asyncio.QueueFull:
+                self.counters["dropped"] += 1
+
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retry_handles.add(handle)
+
+    # -- introspection -------------------------------------------------------
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 4)
+
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            **self.counters,
+            "queue_depth": self._queue.qsize(),
+            "pending_retries": len(self._retry_handles),
+            "smtp_connects": self.pool.connects,
+            "sent_per_second": round(self.counters["sent"] / uptime, 3) if uptime else 0.0,
+            "latency_p50": percentile(0.50),
+            "latency_p95": percentile(0.95),
+            "latency_max": round(latencies[-1], 4) if latencies else None,
+        }
@@ -0,0 +1,218 @@
+"""Recurring preventive maintenance plans.
+
+A plan in `maintenance_plans` repeats work for one asset (equipment_id) or
+for every asset in a category, either every `interval_days` days from
+`start_date` or monthly on `day_of_month` (clamped to short months):
+
+    {id, name, subject, description, equipment_id, category, interval_days,
+     day_of_month, start_date, next_due, active, created_by, created_at,
+     updated_at, last_generated_at}
+
+next_due (YYYY-MM-DD) is the next occurrence not yet turned into requests.
+PlanScheduler keeps (release day, plan id, next_due) for every active plan
+in a heap, where the release day is next_due minus the lead time, so a tick
+only looks at the top of the heap; 100k plans cost one scan at startup and
+one per reload interval, never a query per plan. Due plans are re-read with
+one $in query per batch and handed to the `materialize` callback, which
+writes one request per (plan, asset, date) carrying
+
+    plan_key = "<plan id>:<equipment id>:<YYYY-MM-DD>"
+
+A unique index on plan_key makes that an idempotency key: a batch retried
+after a crash, or run by two API processes at once, cannot create a request
+twice. next_due is then advanced with one bulk_write, each update guarded
+by the previous value so concurrent schedulers agree on who moved it.
+
+A plan that fell behind (the service was down) gets one request for its
+oldest missed date and then resumes from today rather than replaying every
+missed period.
+"""
+import asyncio
+import calendar
+import heapq
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+
+def occurrence_on_or_after(plan: dict, day: date) -> date:
+    """First date on or after `day` (and not before start_date) on which the plan falls."""
+    start = date.fromisoformat(plan["start_date"])
+    day = max(day, start)
+    if plan.get("interval_days"):
+        interval = plan["interval_days"]
+        periods = -(-(day - start).days // interval)
+        return start + timedelta(days=periods * interval)
+
+    year, month = day.year, day.month
+    while True:
+        candidate = date(year, month, min(plan["day_of_month"], calendar.monthrange(year, month)[1]))
+        if candidate >= day:
+            return candidate
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def plan_key(plan_id: str, equipment_id: str, due: str) -> str:
+    return f"{plan_id}:{equipment_id}:{due}"
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+class PlanScheduler:
+    """Turns due plan occurrences into requests, driven by an in-memory due-date heap."""
+
+    def __init__(self, db, materialize: Callable[[List[dict]], Awaitable[int]], lead_days: int = 7,
+                 batch_size: int = 500, reload_seconds: float = 300, retry_seconds: float = 60):
+        self.db = db
+        self.materialize = materialize
+        self.lead_days = lead_days
+        self.batch_size = batch_size
+        self.reload_seconds = reload_seconds
+        self.retry_seconds = retry_seconds
+        self._heap: list = []
+        self._next_due: Dict[str, str] = {}  # plan id -> next_due its live heap entry carries
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {"batches": 0, "occurrences": 0, "requests_created": 0, "failures": 0}
+
+    async def start(self):
+        await self.reload()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {**self._stats, "plans": len(self._next_due), "heap": len(self._heap)}
+
+    async def reload(self):
+        """Rebuild the heap from one scan of the active plans."""
+        plans = await self.db.maintenance_plans.find(
+            {"active": True}, {"_id": 0, "id": 1, "next_due": 1}
+        ).to_list(None)
+        self._next_due = {plan["id"]: plan["next_due"] for plan in plans}
+        self._heap = [self._entry(plan["id"], plan["next_due"]) for plan in plans]
+        heapq.heapify(self._heap)
+
+    def schedule(self, plan: dict):
+        """Track a created or edited plan; call after writing it."""
+        if not plan.get("active"):
+            self.remove(plan["id"])
+            return
+        self._push(plan["id"], plan["next_due"])
+        self._wakeup.set()
+
+    def remove(self, plan_id: str):
+        # its heap entries go stale and are skipped when popped
+        self._next_due.pop(plan_id, None)
+
+    async def run_due(self, today: Optional[date] = None) -> int:
+        """Materialize every occurrence released by `today`, batch by batch; returns requests created."""
+        today = today or _today()
+        created = 0
+        while True:
+            batch = self._pop_due(today)
+            if not batch:
+                return created
+            try:
+                created += await self._process(batch, today)
+            except Exception:
+                for plan_id, due in batch.items():
+                    self._push(plan_id, due)
+                raise
+
+    def _entry(self, plan_id: str, due: str) -> tuple:
+        release = (date.fromisoformat(due) - timedelta(days=self.lead_days)).isoformat()
+        return (release, plan_id, due)
+
+    def _push(self, plan_id: str, due: str):
+        self._next_due[plan_id] = due
+        heapq.heappush(self._heap, self._entry(plan_id, due))
+
+    def _pop_due(self, today: date) -> Dict[str, str]:
+        today = today.isoformat()
+        batch = {}
+        while self._heap and self._heap[0][0] <= today and len(batch) < self.batch_size:
+            _, plan_id, due = heapq.heappop(self._heap)
+            if self._next_due.get(plan_id) == due:
+                batch[plan_id] = due
+        return batch
+
+    async def _process(self, batch: Dict[str, str], today: date) -> int:
+        # one read for the whole batch: picks up edits and deletions made by other processes
+        plans = await self.db.maintenance_plans.find(
+            {"id": {"$in": list(batch)}, "active": True}, {"_id": 0}
+        ).to_list(len(batch))
+        found = {plan["id"] for plan in plans}
+        for plan_id in batch.keys() - found:
+            self._next_due.pop(plan_id, None)
+
+        due_plans = []
+        for plan in plans:
+            if plan["next_due"] == batch[plan["id"]]:
+                due_plans.append(plan)
+            else:
+                self._push(plan["id"], plan["next_due"])
+        if not due_plans:
+            return 0
+
+        created = await self.materialize(due_plans)
+
+        now = datetime.now(timezone.utc)
+        operations = []
+        for plan in due_plans:
+            after = max(date.fromisoformat(plan["next_due"]) + timedelta(days=1), today)
+            next_due = occurrence_on_or_after(plan, after).isoformat()
+            operations.append(UpdateOne(
+                {"id": plan["id"], "next_due": plan["next_due"]},
+                {"$set": {"next_due": next_due, "last_generated_at": now}},
+            ))
+            self._push(plan["id"], next_due)
+        await self.db.maintenance_plans.bulk_write(operations, ordered=False)
+
+        self._stats["batches"] += 1
+        self._stats["occurrences"] += len(due_plans)
+        self._stats["requests_created"] += created
+        logger.info("Maintenance plans materialized", extra={"plans": len(due_plans), "requests": created})
+        return created
+
+    def _seconds_until_next_release(self) -> float:
+        if not self._heap:
+            return self.reload_seconds
+        release = date.fromisoformat(self._heap[0][0])
+        if release <= _today():
+            return 0.0
+        at = datetime.combine(release, time.min, tzinfo=timezone.utc)
+        return (at - datetime.now(timezone.utc)).total_seconds()
+
+    async def _loop(self):
+        last_reload = asyncio.get_running_loop().time()
+        while True:
+            delay = 0.0
+            try:
+                if asyncio.get_running_loop().time() - last_reload >= self.reload_seconds:
+                    await self.reload()
+                    last_reload = asyncio.get_running_loop().time()
+                await self.run_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._stats["failures"] += 1
+                logger.exception("Maintenance plan run failed")
+                delay = self.retry_seconds
+
+            delay = max(delay, min(self._seconds_until_next_release(), self.reload_seconds))
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,273 @@
+"""Prometheus-format metrics for GearGuard.
+
+A deliberately small in-process registry (counters, gauges and cumulative
+histograms) rendered in the Prometheus text exposition format, so the
+service needs no extra dependency. Recording a sample is a dict lookup, a
+bisect and a couple of additions under an uncontended lock; the lock is
+there because PyMongo's command listeners fire on Motor's executor threads.
+
+Three sources feed the registry:
+
+  MetricsMiddleware     per-route latency histograms, in-flight gauge and
+                        status counts for every HTTP request
+  MongoCommandMetrics   a pymongo CommandListener timing every command by
+                        collection and operation
+  scrape callbacks      point-in-time values (email queue depth and outcomes,
+                        SSE connections, ...) read only when /metrics is hit
+"""
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+# seconds; HTTP handlers range from sub-millisecond cache hits to bcrypt logins
+HTTP_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# seconds; most Mongo commands are indexed point reads
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values, value: float):
+        with self._lock:
+            self._values[label_values] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets: Sequence[float] = HTTP_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (non-cumulative, +Inf last), sum, count]
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, *label_values, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        lines = self.header()
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._callbacks: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=HTTP_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def add_callback(self, callback):
+        """Register `callback() -> [(name, kind, help, labels, value), ...]`, called on each scrape."""
+        self._callbacks.append(callback)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        seen = set()
+        for callback in self._callbacks:
+            for name, kind, documentation, labels, value in callback():
+                if value is None:
+                    continue
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {documentation}")
+                    lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request under its route template.
+
+    The route is read from the scope after the router has matched it, so
+    /api/requests/{request_id} is one series rather than one per id;
+    unmatched paths share a single "<unmatched>" series.
+    """
+
+    def __init__(self, app, registry: Registry, exclude_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+        self.in_flight = registry.gauge(
+            "http_requests_in_flight", "HTTP requests currently being served.", ["method"])
+        self.requests = registry.counter(
+            "http_requests_total", "HTTP requests served, by route and status code.", ["method", "route", "status"])
+        self.errors = registry.counter(
+            "http_request_errors_total", "HTTP requests that failed with a 5xx or an unhandled exception.",
+            ["method", "route"])
+        self.latency = registry.histogram(
+            "http_request_duration_seconds", "Time to the end of the response body, by route.", ["method", "route"])
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.in_flight.dec(method)
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "<unmatched>"
+            self.latency.observe(method, route, value=elapsed)
+            self.requests.inc(method, route, str(status))
+            if status >= 500:
+                self.errors.inc(method, route)
+
+
+# commands whose first field does not name a collection
+_NO_COLLECTION = {"ping", "hello", "ismaster", "isMaster", "buildInfo", "endSessions", "listCollections",
+                  "listDatabases", "dropDatabase", "saslStart", "saslContinue", "killCursors"}
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every command sent by the Mongo client, by collection and operation.
+
+    getMore is recorded against the collection it pages through, so large
+    cursor reads show up as their real cost rather than one fast `find`.
+    """
+
+    def __init__(self, registry: Registry):
+        self.latency = registry.histogram(
+            "mongodb_command_duration_seconds", "Round-trip time of MongoDB commands.",
+            ["collection", "command"], buckets=MONGO_BUCKETS)
+        self.failures = registry.counter(
+            "mongodb_command_failures_total", "MongoDB commands that returned an error.", ["collection", "command"])
+        self._pending: Dict[Tuple[int, int], Tuple[str, str]] = {}
+
+    def _key(self, event):
+        return event.request_id, event.operation_id
+
+    def started(self, event):
+        command = event.command_name
+        collection = "-"
+        if command not in _NO_COLLECTION:
+            target = event.command.get("collection") if command == "getMore" else event.command.get(command)
+            if isinstance(target, str):
+                collection = target
+        self._pending[self._key(event)] = (collection, command)
+
+    def succeeded(self, event):
+        labels = self._pending.pop(self._key(event), None)
+        if labels is not None:
+            self.latency.observe(*labels, value=event.duration_micros / 1e6)
+
+    def failed(self, event):
+        labels = self._pending.pop(self._key(event), None)
+        if labels is not None:
+            self.latency.observe(*labels, value=event.duration_micros / 1e6)
+            self.failures.inc(*labels)
+
+
+def stats_callback(prefix: str, documentation: str, get_stats: Callable[[], Optional[dict]],
+                   counters: Sequence[str] = (), gauges: Sequence[str] = ()):
+    """Expose selected keys of a component's stats() dict, read at scrape time."""
+    def collect():
+        stats = get_stats()
+        if not stats:
+            return []
+        samples = []
+        for key in counters:
+            samples.append((f"{prefix}_{key}_total", "counter", f"{documentation}: {key}.", {}, stats.get(key)))
+        for key in gauges:
+            samples.append((f"{prefix}_{key}", "gauge", f"{documentation}: {key}.", {}, stats.get(key)))
+        return samples
+    return collect
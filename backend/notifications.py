@@ -0,0 +1,87 @@
+"""Per-user unread notification counters.
+
+Rendering the unread badge used to mean reading and sorting a user's recent
+notifications. Instead, `notification_counters` holds one document per
+recipient, {_id: user id, unread: n}, kept in step with the notifications
+themselves:
+
+    inserting notifications     +1 per unread notification, one bulk_write
+    marking one read            -1 if it was unread before the update
+    marking all read            -(number of notifications the update flipped)
+
+Every change is an $inc of exactly the number of notifications whose
+is_read actually flipped, so concurrent inserts and reads never leave the
+counter wrong. Read notifications carry an expire_at (read time plus the
+retention period) that a TTL index uses to delete them; unread ones never
+expire, so expiry never touches the counters.
+
+rebuild_unread_counters() recomputes the counters from the notifications
+collection, for data written before counters existed or written directly.
+backfill_read_expiry() gives notifications read before expiry existed a
+read_at and expire_at, so the TTL index clears that backlog too.
+"""
+import logging
+from collections import Counter
+from datetime import timedelta
+from typing import Iterable
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+COUNTER_COLLECTION = "notification_counters"
+
+
+def unread_increments(notifications: Iterable[dict]) -> Counter:
+    """Unread notifications per recipient in a batch about to be inserted."""
+    return Counter(doc["recipient_id"] for doc in notifications if not doc.get("is_read"))
+
+
+async def adjust_unread(db, changes: dict):
+    """Apply {recipient_id: delta} to the counters with one unordered bulk_write."""
+    operations = [
+        UpdateOne({"_id": recipient_id}, {"$inc": {"unread": delta}}, upsert=True)
+        for recipient_id, delta in changes.items()
+        if delta
+    ]
+    if operations:
+        await db[COUNTER_COLLECTION].bulk_write(operations, ordered=False)
+
+
+async def unread_count(db, recipient_id: str) -> int:
+    counter = await db[COUNTER_COLLECTION].find_one({"_id": recipient_id})
+    return max(0, counter["unread"]) if counter else 0
+
+
+async def rebuild_unread_counters(db) -> int:
+    """Recount unread notifications per recipient; returns the number of recipients with unread ones."""
+    pipeline = [
+        {"$match": {"is_read": {"$ne": True}}},
+        {"$group": {"_id": "$recipient_id", "unread": {"$sum": 1}}},
+    ]
+    counts = {row["_id"]: row["unread"] async for row in db.notifications.aggregate(pipeline)}
+    # the reset and the recount are not atomic, so run this while notification traffic is quiet
+    await db[COUNTER_COLLECTION].delete_many({})
+    if counts:
+        await db[COUNTER_COLLECTION].insert_many(
+            [{"_id": recipient_id, "unread": unread} for recipient_id, unread in counts.items()], ordered=False,
+        )
+    logger.info("Rebuilt unread notification counters", extra={"recipients": len(counts)})
+    return len(counts)
+
+
+async def backfill_read_expiry(db, retention_days: float) -> int:
+    """Set read_at/expire_at on read notifications that predate them; returns how many were updated.
+
+    The real read time of these notifications was never recorded, so
+    created_at stands in for it: expire_at is created_at plus the retention
+    period, and anything older than that is removed by the TTL index on its
+    next pass. With retention_days 0 (keep forever) only read_at is set.
+    """
+    fields = {"read_at": "$created_at"}
+    if retention_days > 0:
+        retention_ms = int(timedelta(days=retention_days).total_seconds() * 1000)
+        fields["expire_at"] = {"$add": ["$created_at", retention_ms]}
+    result = await db.notifications.update_many({"is_read": True, "read_at": None}, [{"$set": fields}])
+    logger.info("Backfilled read notification expiry", extra={"notifications": result.modified_count})
+    return result.modified_count
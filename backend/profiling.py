@@ -0,0 +1,187 @@
+"""Opt-in per-request profiling for GearGuard.
+
+A request is profiled when it carries `X-Profile: <PROFILE_TOKEN>` or is
+picked by PROFILE_SAMPLE_RATE. For that request only:
+
+  - a sampler thread snapshots the event-loop thread's stack every
+    PROFILE_INTERVAL_MS and writes the samples in folded-stack format
+    (`frame;frame;frame count`, one stack per line) to PROFILE_DIR, ready for
+    flamegraph.pl, speedscope or inferno;
+  - the time spent in auth, Mongo commands and response serialization is
+    added up and returned in a Server-Timing header, which browser devtools
+    show in the request's timing tab.
+
+The sampler sees whatever the loop thread is running, so samples taken
+while this request is awaiting I/O belong to other requests or to the
+selector (shown as idle time); profile on a quiet instance for clean
+graphs. When neither trigger is configured server.py installs none of
+this: no middleware, no listener, and timed() returns at its first check.
+"""
+import contextvars
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from pymongo import monitoring
+
+from log_config import request_id_var
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("request_timing", default=None)
+
+
+class RequestTiming:
+    """Durations (ms) accumulated for one profiled request, by phase."""
+
+    def __init__(self):
+        self.phases = {}
+        self.counts = Counter()
+        self._lock = threading.Lock()  # Mongo listener callbacks arrive on executor threads
+
+    def add(self, phase: str, milliseconds: float):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + milliseconds
+            self.counts[phase] += 1
+
+    def header(self, total_ms: float) -> str:
+        parts = []
+        for phase, duration in self.phases.items():
+            entry = f"{phase};dur={duration:.2f}"
+            if self.counts[phase] > 1:
+                entry += f';desc="{self.counts[phase]} calls"'
+            parts.append(entry)
+        parts.append(f"total;dur={total_ms:.2f}")
+        return ", ".join(parts)
+
+
+@contextmanager
+def timed(phase: str):
+    """Attribute the wrapped block to `phase` if the current request is being profiled."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(phase, (time.perf_counter() - start) * 1000)
+
+
+class ServerTimingListener(monitoring.CommandListener):
+    """Adds Mongo command round trips to the profiled request's `db` phase.
+
+    Motor runs commands on executor threads with a copy of the caller's
+    context, so the request's RequestTiming is visible here.
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        timing = _current.get()
+        if timing is not None:
+            timing.add("db", event.duration_micros / 1000)
+
+    def failed(self, event):
+        self.succeeded(event)
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval until stopped."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests selected by header token or sampling."""
+
+    def __init__(self, app, output_dir: Path, token: Optional[str] = None,
+                 sample_rate: float = 0.0, interval_ms: float = 2.0):
+        self.app = app
+        self.output_dir = Path(output_dir)
+        self.token = token.encode("latin-1") if token else None
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+
+    def _selected(self, scope) -> bool:
+        if self.token is not None:
+            for name, value in scope.get("headers", []):
+                if name == b"x-profile" and value == self.token:
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._selected(scope):
+            return await self.app(scope, receive, send)
+
+        timing = RequestTiming()
+        context_token = _current.set(timing)
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - start) * 1000
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", timing.header(total_ms).encode("latin-1")),
+                ]
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            sampler.stop()
+            _current.reset(context_token)
+            self._write(scope, sampler, timing, (time.perf_counter() - start) * 1000)
+
+    def _write(self, scope, sampler: StackSampler, timing: RequestTiming, total_ms: float):
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+        request_id = request_id_var.get() or f"{id(sampler):x}"
+        path = self.output_dir / f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{slug}-{request_id}.folded"
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            with open(path, "w") as f:
+                for stack, count in sampler.stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError:
+            logger.exception("Could not write profile", extra={"path": str(path)})
+            return
+        logger.info("Request profiled", extra={
+            "route": route, "method": scope["method"], "duration_ms": round(total_ms, 2),
+            "samples": sum(sampler.stacks.values()), "phases_ms": {k: round(v, 2) for k, v in timing.phases.items()},
+            "profile": str(path),
+        })
@@ -0,0 +1,228 @@
+"""Background refresh of names copied into maintenance requests.
+
+create_request stores equipment_name, equipment_category and team_name on
+each request so list views need no joins. When an asset or team is renamed,
+those copies are rewritten here, off the request path: the PUT handler only
+records a job and returns. The job then selects stale requests a chunk at a
+time (by the indexed equipment_id / team_id plus a "differs from the new
+value" condition) and fixes each chunk with one update_many. Because the
+selection only ever matches stale rows, a job interrupted by a restart is
+simply resumed on the next startup, and re-running one is harmless.
+
+equipment_category is also part of the analytics rollup key, so a job that
+rewrites it moves each request's rollup contribution to the new category.
+Such chunks are written with one bulk_write of per-request updates guarded
+by the updated_at that was read: a request changed in between is left
+stale, so its contribution is never moved from an outdated snapshot, and
+the next chunk picks it up again with fresh values.
+
+Progress lives in the `propagation_jobs` collection:
+
+    {id, source, source_id, set, status, total, matched, modified, chunks, error,
+     created_at, updated_at}
+
+status is one of pending, running, done, superseded (a newer rename of the
+same source replaced it) or failed.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from analytics import CONTRIBUTION_PROJECTION, apply_rollup_delta, merge_deltas, rollup_delta
+
+logger = logging.getLogger(__name__)
+
+# request fields that are part of an analytics rollup key (see analytics.py)
+ROLLUP_KEY_COPIES = {"equipment_category"}
+
+# source collection -> request field holding its id, and source field -> request field
+DENORMALIZED_FIELDS = {
+    "equipment": ("equipment_id", {"name": "equipment_name", "category": "equipment_category"}),
+    "teams": ("team_id", {"name": "team_name"}),
+}
+
+
+def changed_copies(source: str, before: dict, after: dict) -> dict:
+    """Request fields (and new values) that a change from `before` to `after` makes stale."""
+    _, fields = DENORMALIZED_FIELDS[source]
+    return {
+        request_field: after.get(source_field)
+        for source_field, request_field in fields.items()
+        if before.get(source_field) != after.get(source_field)
+    }
+
+
+def current_copies(source: str, doc: dict) -> dict:
+    """Every request field copied from `source`, with its value in `doc`."""
+    _, fields = DENORMALIZED_FIELDS[source]
+    return {request_field: doc.get(source_field) for source_field, request_field in fields.items()}
+
+
+class PropagationRunner:
+    """Runs propagation jobs as background tasks, one at a time per source document."""
+
+    def __init__(self, db, chunk_size: int = 1000, chunk_delay: float = 0.0,
+                 on_chunk: Optional[Callable[[], None]] = None):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.on_chunk = on_chunk
+        self._tasks: Dict[Tuple[str, str], Tuple[dict, asyncio.Task]] = {}
+
+    async def schedule(self, source: str, source_id: str, values: dict) -> str:
+        """Record a job that sets `values` on every request of the source; returns its id.
+
+        `values` must hold every copied field (see current_copies), not just the
+        changed ones, because the job supersedes any older job for the source.
+        """
+        now = datetime.now(timezone.utc)
+        job = {
+            "id": str(uuid.uuid4()),
+            "source": source,
+            "source_id": source_id,
+            "set": values,
+            "status": "pending",
+            "total": None,
+            "matched": 0,
+            "modified": 0,
+            "chunks": 0,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self.db.propagation_jobs.insert_one(job)
+        job.pop("_id", None)
+        await self._start(job)
+        return job["id"]
+
+    async def resume_pending(self):
+        """Restart jobs left pending or running by a previous process."""
+        jobs = await self.db.propagation_jobs.find(
+            {"status": {"$in": ["pending", "running"]}}, {"_id": 0}
+        ).sort("created_at", 1).to_list(None)
+        for job in jobs:
+            await self._start(job)
+        if jobs:
+            logger.info("Resumed %d propagation jobs", len(jobs))
+
+    async def stop(self):
+        """Cancel running jobs; they stay `running` in the database and resume on startup."""
+        tasks = [task for _, task in self._tasks.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def stats(self) -> dict:
+        return {"running": len(self._tasks)}
+
+    async def _start(self, job: dict):
+        key = (job["source"], job["source_id"])
+        previous = self._tasks.get(key)
+        if previous is not None:
+            previous_job, previous_task = previous
+            previous_task.cancel()
+            await asyncio.gather(previous_task, return_exceptions=True)
+            await self._update(previous_job["id"], {"status": "superseded"})
+            older = [previous_job]
+        else:
+            older = await self.db.propagation_jobs.find(
+                {"source": job["source"], "source_id": job["source_id"],
+                 "status": {"$in": ["pending", "running"]}, "id": {"$ne": job["id"]},
+                 "created_at": {"$lt": job["created_at"]}},
+                {"_id": 0, "id": 1, "set": 1},
+            ).sort("created_at", 1).to_list(None)
+            if older:
+                await self.db.propagation_jobs.update_many(
+                    {"id": {"$in": [older_job["id"] for older_job in older]}},
+                    {"$set": {"status": "superseded", "updated_at": datetime.now(timezone.utc)}},
+                )
+
+        # a later job wins, so it takes over whatever the jobs it replaces had yet to write;
+        # for those, a value it sets itself is the newer one
+        merged = {}
+        for older_job in older:
+            merged.update(older_job["set"])
+        merged.update(job["set"])
+        if merged != job["set"]:
+            job["set"] = merged
+            await self._update(job["id"], {"set": merged})
+
+        task = asyncio.create_task(self._run(job))
+        self._tasks[key] = (job, task)
+        task.add_done_callback(lambda t, key=key: self._forget(key, t))
+
+    def _forget(self, key, task):
+        current = self._tasks.get(key)
+        if current is not None and current[1] is task:
+            del self._tasks[key]
+
+    async def _update(self, job_id: str, fields: dict, inc: Optional[dict] = None):
+        update = {"$set": {**fields, "updated_at": datetime.now(timezone.utc)}}
+        if inc:
+            update["$inc"] = inc
+        await self.db.propagation_jobs.update_one({"id": job_id}, update)
+
+    async def _update_and_move_rollups(self, chunk: list, values: dict):
+        result = await self.db.maintenance_requests.bulk_write([
+            UpdateOne({"_id": doc["_id"], "updated_at": doc.get("updated_at")}, {"$set": values})
+            for doc in chunk
+        ], ordered=False)
+        moved = chunk
+        if result.matched_count < len(chunk):
+            # some requests were written concurrently; only those still carrying the
+            # updated_at we read were rewritten by us
+            written = await self.db.maintenance_requests.find(
+                {"$or": [{"_id": doc["_id"], "updated_at": doc.get("updated_at")} for doc in chunk],
+                 **values},
+                {"_id": 1},
+            ).to_list(len(chunk))
+            written_ids = {doc["_id"] for doc in written}
+            moved = [doc for doc in chunk if doc["_id"] in written_ids]
+        await apply_rollup_delta(self.db, merge_deltas(
+            rollup_delta(doc, {**doc, **values}) for doc in moved
+        ))
+        return result
+
+    async def _run(self, job: dict):
+        id_field, _ = DENORMALIZED_FIELDS[job["source"]]
+        values = job["set"]
+        stale = {
+            id_field: job["source_id"],
+            "$or": [{field: {"$ne": value}} for field, value in values.items()],
+        }
+        try:
+            total = await self.db.maintenance_requests.count_documents(stale)
+            await self._update(job["id"], {"status": "running", "total": total})
+            moves_rollups = bool(ROLLUP_KEY_COPIES.intersection(values))
+            projection = {**CONTRIBUTION_PROJECTION, "_id": 1} if moves_rollups else {"_id": 1}
+            while True:
+                chunk = await self.db.maintenance_requests.find(stale, projection).limit(self.chunk_size).to_list(self.chunk_size)
+                if not chunk:
+                    break
+                if moves_rollups:
+                    result = await self._update_and_move_rollups(chunk, values)
+                else:
+                    result = await self.db.maintenance_requests.update_many(
+                        {"_id": {"$in": [doc["_id"] for doc in chunk]}}, {"$set": values}
+                    )
+                await self._update(job["id"], {}, inc={
+                    "matched": result.matched_count, "modified": result.modified_count, "chunks": 1,
+                })
+                if self.on_chunk is not None:
+                    self.on_chunk()
+                if self.chunk_delay:
+                    await asyncio.sleep(self.chunk_delay)
+            await self._update(job["id"], {"status": "done"})
+            logger.info("Propagation job finished", extra={
+                "job_id": job["id"], "source": job["source"], "source_id": job["source_id"], "total": total,
+            })
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Propagation job failed", extra={"job_id": job["id"], "source": job["source"]})
+            await self._update(job["id"], {"status": "failed", "error": str(e)})
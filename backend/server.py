@@ -1,27 +1,82 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
+import re
+import time
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel, Field, ConfigDict, ValidationError
+from typing import Generic, List, Optional, TypeVar, Union
 import uuid
-from datetime import datetime, timezone, timedelta
+import json
+import base64
+import hashlib
+from datetime import date, datetime, timezone, timedelta
 from passlib.context import CryptContext
 import jwt
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+try:
+    import orjson
+except ImportError:  # fast JSON path unavailable; responses go through response_model
+    orjson = None
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from indexes import ensure_indexes
+from bulk_io import ImportReport, detect_format, encode_records, format_validation_error, iter_records
+from mailer import EmailDeliveryWorker, SMTPConnectionPool
+from log_config import RequestIdMiddleware, configure_logging, shutdown_logging
+from analytics import (
+    CLOSED_STAGES, analytics_pipeline, apply_rollup_delta, finish_row, merge_deltas, request_contributions,
+    rollup_delta,
+)
+from events import EventBroker
+from profiling import ProfilingMiddleware, ServerTimingListener, timed
+from metrics import MetricsMiddleware, MongoCommandMetrics, Registry, stats_callback
+from propagation import PropagationRunner, changed_copies, current_copies
+from maintenance_plans import PlanScheduler, occurrence_on_or_after, plan_key
+from notifications import adjust_unread, unread_count, unread_increments
 
 # 1. Configuration & Setup
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics at /metrics; set METRICS_TOKEN to require it as a bearer token
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+metrics_registry = Registry()
+
+# Per-request profiling (profiling.py): requests sending `X-Profile: <PROFILE_TOKEN>`,
+# or a PROFILE_SAMPLE_RATE fraction of all requests, get a Server-Timing header
+# and a folded-stack profile in PROFILE_DIR. Off unless one of the two is set.
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', ROOT_DIR / 'profiles'))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 2))
+PROFILING_ENABLED = bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+mongo_listeners = []
+if METRICS_ENABLED:
+    mongo_listeners.append(MongoCommandMetrics(metrics_registry))
+if PROFILING_ENABLED:
+    mongo_listeners.append(ServerTimingListener())
+
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# tz_aware so timestamps come back from BSON as UTC-aware datetimes
+client = AsyncIOMotorClient(
+    mongo_url,
+    tz_aware=True,
+    event_listeners=mongo_listeners,
+)
 db = client[os.environ['DB_NAME']]
 
 # Email Settings
@@ -29,6 +84,66 @@ SMTP_SERVER = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
 SMTP_PORT = int(os.environ.get('SMTP_PORT', 587))
 SMTP_USER = os.environ.get('SMTP_USER')
 SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD')
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', 'true').lower() == 'true'
+EMAIL_WORKERS = int(os.environ.get('EMAIL_WORKERS', 2))
+EMAIL_QUEUE_SIZE = int(os.environ.get('EMAIL_QUEUE_SIZE', 10000))
+EMAIL_MAX_RETRIES = int(os.environ.get('EMAIL_MAX_RETRIES', 5))
+
+# Set to "false" when indexes are built ahead of the deploy with `python indexes.py`
+ENSURE_INDEXES_ON_STARTUP = os.environ.get('ENSURE_INDEXES_ON_STARTUP', 'true').lower() == 'true'
+
+# bcrypt runs on its own thread pool; callers beyond workers + queue get a 503
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 100))
+
+# Serialize read responses straight from Mongo documents with orjson instead of
+# re-validating them against response_model (requires orjson)
+FAST_JSON_RESPONSES = orjson is not None and os.environ.get('FAST_JSON_RESPONSES', 'true').lower() == 'true'
+
+# Resolved principals cached by get_current_user
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', 60))
+
+# Server-sent events: per-connection queue bound and keep-alive interval
+SSE_QUEUE_SIZE = int(os.environ.get('SSE_QUEUE_SIZE', 100))
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+
+# Most requests a single /requests/bulk-update call may change
+BULK_UPDATE_MAX_ITEMS = int(os.environ.get('BULK_UPDATE_MAX_ITEMS', 1000))
+# Ids of the most recent bulk-update calls remembered on each request
+BULK_UPDATE_IDS_KEPT = 5
+# Rounds of update_request's conditional writes before an assignment that
+# keeps racing other writers gives up with 409
+ASSIGNMENT_UPDATE_ATTEMPTS = 3
+
+# Renames are copied into existing requests in the background, this many per update_many;
+# the optional delay between chunks throttles the job on busy clusters
+PROPAGATION_CHUNK_SIZE = int(os.environ.get('PROPAGATION_CHUNK_SIZE', 1000))
+PROPAGATION_CHUNK_DELAY_SECONDS = float(os.environ.get('PROPAGATION_CHUNK_DELAY_SECONDS', 0))
+
+# /search: deepest offset a client may page to; ranked search is for finding, not browsing
+SEARCH_MAX_OFFSET = int(os.environ.get('SEARCH_MAX_OFFSET', 200))
+
+# Recurring maintenance plans: requests are created PM_LEAD_DAYS before their
+# scheduled date, at most PM_BATCH_SIZE plans per batch; the in-memory schedule
+# is re-read from Mongo every PM_RELOAD_SECONDS
+PM_SCHEDULER_ENABLED = os.environ.get('PM_SCHEDULER_ENABLED', 'true').lower() == 'true'
+PM_LEAD_DAYS = int(os.environ.get('PM_LEAD_DAYS', 7))
+PM_BATCH_SIZE = int(os.environ.get('PM_BATCH_SIZE', 500))
+PM_RELOAD_SECONDS = float(os.environ.get('PM_RELOAD_SECONDS', 300))
+
+# Read notifications are deleted (TTL index on expire_at) this many days after
+# being read; 0 keeps them forever. Unread notifications never expire.
+NOTIFICATION_RETENTION_DAYS = float(os.environ.get('NOTIFICATION_RETENTION_DAYS', 30))
+
+# Rows per insert_many during bulk imports
+IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 1000))
+
+# Cursor batch size (and rows per streamed chunk) for exports
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+
+# How long a computed /dashboard/stats payload is served before recomputing
+DASHBOARD_STATS_TTL_SECONDS = float(os.environ.get('DASHBOARD_STATS_TTL_SECONDS', 10))
 
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
@@ -36,6 +151,8 @@ api_router = APIRouter(prefix="/api")
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+event_broker = EventBroker(queue_size=SSE_QUEUE_SIZE)
+
 SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
 ALGORITHM = "HS256"
 
@@ -116,6 +233,8 @@ class MaintenanceRequest(BaseModel):
     created_by: str
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    closed_at: Optional[datetime] = None
+    plan_id: Optional[str] = None
 
 class MaintenanceRequestCreate(BaseModel):
     subject: str
@@ -132,6 +251,36 @@ class MaintenanceRequestUpdate(BaseModel):
     duration: Optional[float] = None
     scheduled_date: Optional[str] = None
 
+class BulkRequestUpdateItem(BaseModel):
+    id: str
+    stage: Optional[str] = None
+    assigned_to: Optional[str] = None
+
+class BulkRequestUpdate(BaseModel):
+    items: List[BulkRequestUpdateItem]
+
+class MaintenancePlanCreate(BaseModel):
+    name: str
+    subject: str
+    description: Optional[str] = None
+    # exactly one target: a single asset, or every asset in a category
+    equipment_id: Optional[str] = None
+    category: Optional[str] = None
+    # exactly one recurrence: every N days from start_date, or monthly on a day
+    interval_days: Optional[int] = Field(None, ge=1, le=3660)
+    day_of_month: Optional[int] = Field(None, ge=1, le=31)
+    start_date: str
+    active: bool = True
+
+class MaintenancePlan(MaintenancePlanCreate):
+    model_config = ConfigDict(extra="ignore")
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    next_due: str
+    created_by: str
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    last_generated_at: Optional[datetime] = None
+
 class Notification(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -140,6 +289,14 @@ class Notification(BaseModel):
     request_id: str
     is_read: bool = False
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    read_at: Optional[datetime] = None
+    expire_at: Optional[datetime] = None
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
 
 # 3. Helper Functions
 def hash_password(password: str) -> str:
@@ -148,65 +305,260 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+# bcrypt takes 100-300 ms of CPU per call; running it inline would stall the
+# event loop for every other request, so it goes through a bounded executor.
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_password_slots = asyncio.Semaphore(PASSWORD_HASH_WORKERS)
+password_hash_stats = {"running": 0, "queued": 0, "max_queued": 0, "completed": 0, "rejected": 0}
+
+async def run_password_op(fn, *args):
+    stats = password_hash_stats
+    if stats["running"] + stats["queued"] >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE:
+        stats["rejected"] += 1
+        raise HTTPException(status_code=503, detail="Authentication is busy, please retry", headers={"Retry-After": "1"})
+
+    if _password_slots.locked():
+        stats["queued"] += 1
+        stats["max_queued"] = max(stats["max_queued"], stats["queued"])
+        try:
+            await _password_slots.acquire()
+        finally:
+            stats["queued"] -= 1
+    else:
+        await _password_slots.acquire()
+
+    stats["running"] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor, fn, *args)
+    finally:
+        stats["running"] -= 1
+        stats["completed"] += 1
+        _password_slots.release()
+
+async def hash_password_async(password: str) -> str:
+    return await run_password_op(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_password_op(verify_password, plain_password, hashed_password)
+
+class LRUCache:
+    """Bounded in-process LRU map whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value):
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+# The API only ever inserts users (register), so nothing invalidates entries:
+# the TTL is the only way they go stale. A user edited or deleted directly in
+# the database is served from the cache for up to USER_CACHE_TTL_SECONDS.
+user_cache = LRUCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+
 def create_token(user_id: str, email: str) -> str:
     expiration = datetime.now(timezone.utc) + timedelta(days=7)
     return jwt.encode({"user_id": user_id, "email": email, "exp": expiration}, SECRET_KEY, algorithm=ALGORITHM)
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    with timed("auth"):
+        return await user_from_token(credentials.credentials)
+
+async def user_from_token(token: str) -> User:
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("user_id")
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
-        if not user:
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user
+        user_doc = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+        if not user_doc:
             raise HTTPException(status_code=401, detail="User not found")
-        return User(**user)
+        user = User(**user_doc)
+        user_cache.set(user_id, user)
+        return user
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+class FastJSONResponse(ORJSONResponse):
+    def render(self, content) -> bytes:
+        # UTC "Z" suffix and naive-as-UTC match how pydantic renders our timestamps
+        with timed("serialization"):
+            return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS)
+
+def fast_response(content, headers: Optional[dict] = None):
+    """Return documents read from Mongo without a second pydantic pass.
+
+    Documents are written from the models and read back with {"_id": 0} (and
+    any secret fields projected away), so they already have the response
+    shape; returning a Response makes FastAPI skip response_model validation
+    while the declared model still drives the OpenAPI schema.
+    """
+    if FAST_JSON_RESPONSES:
+        return FastJSONResponse(content, headers=headers)
+    if headers:
+        return JSONResponse(jsonable_encoder(content), headers=headers)
+    return content
+
+# Request reads also leave out bookkeeping the API keeps on request documents
+# (the ids of recent bulk updates, the plan_key of plan-generated requests)
+# that MaintenanceRequest does not declare.
+REQUEST_PROJECTION = {"_id": 0, "bulk_update_ids": 0, "plan_key": 0}
+
+# Conditional GET: every collection has an in-process version that is bumped
+# by mark_changed() on each write. A read's ETag is derived from the versions
+# it depends on plus its URL, so a matching If-None-Match can be answered with
+# 304 before Mongo is queried. Versions live in this process (start.sh runs a
+# single uvicorn worker); the boot epoch keeps ETags from a previous process
+# from ever matching.
+_VERSION_EPOCH = uuid.uuid4().hex[:8]
+collection_versions = {"users": 0, "equipment": 0, "teams": 0, "maintenance_requests": 0}
+# collections whose counts feed /dashboard/stats
+_DASHBOARD_COLLECTIONS = {"equipment", "teams", "maintenance_requests"}
+
+def mark_changed(*collections: str):
+    """Record a write to `collections`: bump their ETag versions and drop dependent caches."""
+    for name in collections:
+        collection_versions[name] = collection_versions.get(name, 0) + 1
+    if _DASHBOARD_COLLECTIONS.intersection(collections):
+        invalidate_dashboard_stats()
+
+def compute_etag(collections, request: Request) -> str:
+    versions = ".".join(str(collection_versions.get(name, 0)) for name in collections)
+    url_digest = hashlib.blake2b(f"{request.url.path}?{request.url.query}".encode(), digest_size=6).hexdigest()
+    return f'"{_VERSION_EPOCH}-{versions}-{url_digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def conditional_get(*collections: str):
+    """Dependency for read endpoints: 304 if the client's copy is current, else the ETag to send."""
+    async def check(request: Request) -> dict:
+        etag = compute_etag(collections, request)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        return headers
+    return check
+
+# Keyset pagination: pages are ordered newest first by (created_at, id) and the
+# cursor is the sort key of the last row served, so each page is a single
+# indexed range scan no matter how deep the client has paged.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(doc: dict) -> str:
+    created_at = doc.get("created_at")
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    raw = json.dumps([created_at, doc.get("id")]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        created_at = datetime.fromisoformat(created_at)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return created_at, last_id
+
+async def fetch_page(collection, query: dict, projection: dict, limit: int, cursor: Optional[str]):
+    """Return (docs, next_cursor) for one page of `collection` matching `query`."""
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        after_cursor = {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": last_id}},
+        ]}
+        query = {"$and": [query, after_cursor]} if query else after_cursor
+
+    docs = await collection.find(query, projection).sort(
+        [("created_at", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1])
+    return docs, next_cursor
+
+# Denormalized copies: requests carry equipment/team names, refreshed in the
+# background by propagation.py when the source is renamed.
+propagation_runner = PropagationRunner(
+    db,
+    chunk_size=PROPAGATION_CHUNK_SIZE,
+    chunk_delay=PROPAGATION_CHUNK_DELAY_SECONDS,
+    on_chunk=lambda: mark_changed("maintenance_requests"),
+)
+
+async def propagate_renames(source: str, source_id: str, before: dict, after: dict) -> Optional[dict]:
+    """Start a propagation job if the update changed copied fields; returns the header naming it."""
+    if not changed_copies(source, before, after):
+        return None
+    # the job carries every copied field, since it supersedes any job still running for the source
+    job_id = await propagation_runner.schedule(source, source_id, current_copies(source, after))
+    return {"X-Propagation-Job": job_id}
+
 # ==============================================================================
-# DEBUG: Send Email Function
+# Email Delivery
 # ==============================================================================
+# Mail goes out through a background worker holding persistent SMTP
+# connections; handlers only enqueue. Without SMTP_USER (the sender address)
+# email is disabled.
+email_worker = None
+if SMTP_USER:
+    email_worker = EmailDeliveryWorker(
+        SMTPConnectionPool(
+            SMTP_SERVER, SMTP_PORT, SMTP_USER, SMTP_PASSWORD,
+            starttls=SMTP_STARTTLS, size=EMAIL_WORKERS,
+        ),
+        sender=SMTP_USER,
+        workers=EMAIL_WORKERS,
+        queue_size=EMAIL_QUEUE_SIZE,
+        max_retries=EMAIL_MAX_RETRIES,
+    )
+
 def send_email_notification(recipients: List[str], subject: str, body: str):
     """
-    Sends an email to a list of recipients.
+    Queues an email to a list of recipients for background delivery.
     """
-    print(f"\n[EMAIL DEBUG] Starting background email task...")
-    print(f"[EMAIL DEBUG] Recipients: {recipients}")
-    print(f"[EMAIL DEBUG] Subject: {subject}")
-    
-    if not SMTP_USER or not SMTP_PASSWORD:
-        print("[EMAIL DEBUG] ERROR: SMTP_USER or SMTP_PASSWORD not set in .env file.")
+    if email_worker is None:
+        logger.debug("Email disabled (SMTP_USER not set); skipping %r", subject)
         return
-
-    print(f"[EMAIL DEBUG] SMTP Config: Server={SMTP_SERVER}, Port={SMTP_PORT}, User={SMTP_USER}")
-
-    msg = MIMEMultipart()
-    msg['From'] = SMTP_USER
-    msg['Subject'] = subject
-    msg['To'] = ", ".join(recipients)
-    msg.attach(MIMEText(body, 'plain'))
-
-    try:
-        print("[EMAIL DEBUG] Connecting to SMTP server...")
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        
-        print("[EMAIL DEBUG] Logging in...")
-        server.login(SMTP_USER, SMTP_PASSWORD)
-        
-        print(f"[EMAIL DEBUG] Sending email to {len(recipients)} recipients...")
-        server.sendmail(SMTP_USER, recipients, msg.as_string())
-        
-        server.quit()
-        print(f"[EMAIL DEBUG] SUCCESS: Email sent successfully!\n")
-    except Exception as e:
-        print(f"[EMAIL DEBUG] FAILURE: Failed to send email.")
-        print(f"[EMAIL DEBUG] Exception Error: {e}\n")
+    email_worker.enqueue(recipients, subject, body)
 # ==============================================================================
 
 # 4. Auth Routes
@@ -218,10 +570,10 @@ async def register(user_create: UserCreate):
     
     user = User(email=user_create.email, name=user_create.name, role=user_create.role)
     user_dict = user.model_dump()
-    user_dict["password"] = hash_password(user_create.password)
-    user_dict["created_at"] = user_dict["created_at"].isoformat()
+    user_dict["password"] = await hash_password_async(user_create.password)
     
     await db.users.insert_one(user_dict)
+    mark_changed("users")
     token = create_token(user.id, user.email)
     
     return {"user": user.model_dump(), "token": token}
@@ -229,7 +581,7 @@ async def register(user_create: UserCreate):
 @api_router.post("/auth/login")
 async def login(login_data: UserLogin):
     user_doc = await db.users.find_one({"email": login_data.email}, {"_id": 0})
-    if not user_doc or not verify_password(login_data.password, user_doc.get("password", "")):
+    if not user_doc or not await verify_password_async(login_data.password, user_doc.get("password", "")):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     user = User(**user_doc)
@@ -241,32 +593,48 @@ async def login(login_data: UserLogin):
 async def get_me(current_user: User = Depends(get_current_user)):
     return current_user
 
+@api_router.get("/auth/cache-stats")
+async def get_auth_cache_stats(current_user: User = Depends(get_current_user)):
+    return user_cache.stats()
+
+@api_router.get("/auth/hasher-stats")
+async def get_password_hasher_stats(current_user: User = Depends(get_current_user)):
+    return {"workers": PASSWORD_HASH_WORKERS, "queue_size": PASSWORD_HASH_QUEUE_SIZE, **password_hash_stats}
+
 # 5. Equipment Routes
 @api_router.post("/equipment", response_model=Equipment)
 async def create_equipment(equipment_data: EquipmentCreate, current_user: User = Depends(get_current_user)):
     equipment = Equipment(**equipment_data.model_dump())
     equipment_dict = equipment.model_dump()
-    equipment_dict["created_at"] = equipment_dict["created_at"].isoformat()
     
     await db.equipment.insert_one(equipment_dict)
+    mark_changed("equipment")
     return equipment
 
-@api_router.get("/equipment", response_model=List[Equipment])
-async def get_equipment(current_user: User = Depends(get_current_user)):
-    equipment_list = await db.equipment.find({}, {"_id": 0}).to_list(1000)
-    for eq in equipment_list:
-        if isinstance(eq.get("created_at"), str):
-            eq["created_at"] = datetime.fromisoformat(eq["created_at"])
-    return equipment_list
+@api_router.get("/equipment", response_model=Union[Page[Equipment], List[Equipment]])
+async def get_equipment(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    paginate: bool = True,
+    current_user: User = Depends(get_current_user),
+    cache_headers: dict = Depends(conditional_get("equipment"))
+):
+    # paginate=false keeps the legacy plain-list response while clients migrate
+    if paginate:
+        equipment_list, next_cursor = await fetch_page(db.equipment, {}, {"_id": 0}, limit, cursor)
+        return fast_response({"items": equipment_list, "next_cursor": next_cursor}, cache_headers)
+    return fast_response(await db.equipment.find({}, {"_id": 0}).to_list(1000), cache_headers)
 
 @api_router.get("/equipment/{equipment_id}", response_model=Equipment)
-async def get_equipment_by_id(equipment_id: str, current_user: User = Depends(get_current_user)):
+async def get_equipment_by_id(
+    equipment_id: str,
+    current_user: User = Depends(get_current_user),
+    cache_headers: dict = Depends(conditional_get("equipment"))
+):
     equipment = await db.equipment.find_one({"id": equipment_id}, {"_id": 0})
     if not equipment:
         raise HTTPException(status_code=404, detail="Equipment not found")
-    if isinstance(equipment.get("created_at"), str):
-        equipment["created_at"] = datetime.fromisoformat(equipment["created_at"])
-    return Equipment(**equipment)
+    return fast_response(equipment, cache_headers)
 
 @api_router.put("/equipment/{equipment_id}", response_model=Equipment)
 async def update_equipment(equipment_id: str, equipment_data: EquipmentCreate, current_user: User = Depends(get_current_user)):
@@ -276,55 +644,67 @@ async def update_equipment(equipment_id: str, equipment_data: EquipmentCreate, c
     
     update_data = equipment_data.model_dump()
     await db.equipment.update_one({"id": equipment_id}, {"$set": update_data})
+    mark_changed("equipment")
     
     updated = await db.equipment.find_one({"id": equipment_id}, {"_id": 0})
-    if isinstance(updated.get("created_at"), str):
-        updated["created_at"] = datetime.fromisoformat(updated["created_at"])
-    return Equipment(**updated)
+    return fast_response(updated, await propagate_renames("equipment", equipment_id, existing, updated))
 
 @api_router.delete("/equipment/{equipment_id}")
 async def delete_equipment(equipment_id: str, current_user: User = Depends(get_current_user)):
     result = await db.equipment.delete_one({"id": equipment_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Equipment not found")
+    mark_changed("equipment")
     return {"message": "Equipment deleted"}
 
-@api_router.get("/equipment/{equipment_id}/requests", response_model=List[MaintenanceRequest])
-async def get_equipment_requests(equipment_id: str, current_user: User = Depends(get_current_user)):
-    requests = await db.maintenance_requests.find({"equipment_id": equipment_id}, {"_id": 0}).to_list(1000)
-    for req in requests:
-        if isinstance(req.get("created_at"), str):
-            req["created_at"] = datetime.fromisoformat(req["created_at"])
-        if isinstance(req.get("updated_at"), str):
-            req["updated_at"] = datetime.fromisoformat(req["updated_at"])
-    return requests
+@api_router.get("/equipment/{equipment_id}/requests", response_model=Union[Page[MaintenanceRequest], List[MaintenanceRequest]])
+async def get_equipment_requests(
+    equipment_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    paginate: bool = True,
+    current_user: User = Depends(get_current_user),
+    cache_headers: dict = Depends(conditional_get("maintenance_requests"))
+):
+    query = {"equipment_id": equipment_id}
+    if paginate:
+        requests, next_cursor = await fetch_page(db.maintenance_requests, query, REQUEST_PROJECTION, limit, cursor)
+        return fast_response({"items": requests, "next_cursor": next_cursor}, cache_headers)
+    return fast_response(await db.maintenance_requests.find(query, REQUEST_PROJECTION).to_list(1000), cache_headers)
 
 # 6. Team Routes
 @api_router.post("/teams", response_model=MaintenanceTeam)
 async def create_team(team_data: MaintenanceTeamCreate, current_user: User = Depends(get_current_user)):
     team = MaintenanceTeam(**team_data.model_dump())
     team_dict = team.model_dump()
-    team_dict["created_at"] = team_dict["created_at"].isoformat()
     
     await db.teams.insert_one(team_dict)
+    mark_changed("teams")
     return team
 
-@api_router.get("/teams", response_model=List[MaintenanceTeam])
-async def get_teams(current_user: User = Depends(get_current_user)):
-    teams = await db.teams.find({}, {"_id": 0}).to_list(1000)
-    for team in teams:
-        if isinstance(team.get("created_at"), str):
-            team["created_at"] = datetime.fromisoformat(team["created_at"])
-    return teams
+@api_router.get("/teams", response_model=Union[Page[MaintenanceTeam], List[MaintenanceTeam]])
+async def get_teams(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    paginate: bool = True,
+    current_user: User = Depends(get_current_user),
+    cache_headers: dict = Depends(conditional_get("teams"))
+):
+    if paginate:
+        teams, next_cursor = await fetch_page(db.teams, {}, {"_id": 0}, limit, cursor)
+        return fast_response({"items": teams, "next_cursor": next_cursor}, cache_headers)
+    return fast_response(await db.teams.find({}, {"_id": 0}).to_list(1000), cache_headers)
 
 @api_router.get("/teams/{team_id}", response_model=MaintenanceTeam)
-async def get_team_by_id(team_id: str, current_user: User = Depends(get_current_user)):
+async def get_team_by_id(
+    team_id: str,
+    current_user: User = Depends(get_current_user),
+    cache_headers: dict = Depends(conditional_get("teams"))
+):
     team = await db.teams.find_one({"id": team_id}, {"_id": 0})
     if not team:
         raise HTTPException(status_code=404, detail="Team not found")
-    if isinstance(team.get("created_at"), str):
-        team["created_at"] = datetime.fromisoformat(team["created_at"])
-    return MaintenanceTeam(**team)
+    return fast_response(team, cache_headers)
 
 @api_router.put("/teams/{team_id}", response_model=MaintenanceTeam)
 async def update_team(team_id: str, team_data: MaintenanceTeamCreate, current_user: User = Depends(get_current_user)):
@@ -334,237 +714,662 @@ async def update_team(team_id: str, team_data: MaintenanceTeamCreate, current_us
     
     update_data = team_data.model_dump()
     await db.teams.update_one({"id": team_id}, {"$set": update_data})
+    mark_changed("teams")
     
     updated = await db.teams.find_one({"id": team_id}, {"_id": 0})
-    if isinstance(updated.get("created_at"), str):
-        updated["created_at"] = datetime.fromisoformat(updated["created_at"])
-    return MaintenanceTeam(**updated)
+    return fast_response(updated, await propagate_renames("teams", team_id, existing, updated))
 
 @api_router.delete("/teams/{team_id}")
 async def delete_team(team_id: str, current_user: User = Depends(get_current_user)):
     result = await db.teams.delete_one({"id": team_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Team not found")
+    mark_changed("teams")
     return {"message": "Team deleted"}
 
-@api_router.get("/users", response_model=List[User])
-async def get_users(current_user: User = Depends(get_current_user)):
-    users = await db.users.find({}, {"_id": 0, "password": 0}).to_list(1000)
-    for user in users:
-        if isinstance(user.get("created_at"), str):
-            user["created_at"] = datetime.fromisoformat(user["created_at"])
-    return users
+@api_router.get("/users", response_model=Union[Page[User], List[User]])
+async def get_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    paginate: bool = True,
+    current_user: User = Depends(get_current_user),
+    cache_headers: dict = Depends(conditional_get("users"))
+):
+    if paginate:
+        users, next_cursor = await fetch_page(db.users, {}, {"_id": 0, "password": 0}, limit, cursor)
+        return fast_response({"items": users, "next_cursor": next_cursor}, cache_headers)
+    return fast_response(await db.users.find({}, {"_id": 0, "password": 0}).to_list(1000), cache_headers)
 
 # 7. Request Routes
+async def deliver_notifications(notifications: List[dict]):
+    """Store new in-app notifications, bump their recipients' unread counters and push them over SSE."""
+    if not notifications:
+        return
+    await db.notifications.insert_many(notifications, ordered=False)
+    await adjust_unread(db, unread_increments(notifications))
+    for notif_dict in notifications:
+        notif_dict.pop("_id", None)
+        event_broker.publish("notification", notif_dict, recipients=[notif_dict["recipient_id"]])
+
+async def notify_teams_of_requests(pairs: List[tuple], exclude_user_id: Optional[str] = None):
+    """Fan new requests out to their teams, given (request, team) pairs.
+
+    Every member gets one in-app notification per request and each request
+    sends one email to its team. Members of all the teams are fetched with a
+    single $in query and notifications written with a single insert_many, so
+    the cost stays flat as teams and batches grow.
+    """
+    member_ids = list(dict.fromkeys(
+        m for _, team in pairs for m in team.get("member_ids") or [] if m != exclude_user_id
+    ))
+    if not member_ids:
+        return
+
+    members = await db.users.find(
+        {"id": {"$in": member_ids}}, {"_id": 0, "id": 1, "email": 1}
+    ).to_list(len(member_ids))
+    members_by_id = {m["id"]: m for m in members}
+
+    notifications_to_insert = []
+    emails = []
+    for request, team in pairs:
+        recipient_emails = []
+        for member_id in dict.fromkeys(team.get("member_ids") or []):
+            member_user = members_by_id.get(member_id)
+            if member_id == exclude_user_id or not member_user:
+                continue
+            if member_user.get("email"):
+                recipient_emails.append(member_user["email"])
+
+            # In-App Notification
+            new_notification = Notification(
+                recipient_id=member_id,
+                request_id=request.id,
+                message=f"New maintenance request: {request.subject}",
+            )
+            notifications_to_insert.append(new_notification.model_dump())
+
+        if recipient_emails:
+            email_subject = f"Maintenance Request: {request.subject}"
+            email_body = (
+                f"Hello Team,\n\n"
+                f"A new maintenance request has been created.\n\n"
+                f"Equipment: {request.equipment_name}\n"
+                f"Issue: {request.subject}\n"
+                f"Priority: {request.request_type}\n\n"
+                f"Please check the dashboard for details."
+            )
+            emails.append((recipient_emails, email_subject, email_body))
+
+    await deliver_notifications(notifications_to_insert)
+    for recipients, email_subject, email_body in emails:
+        send_email_notification(recipients, email_subject, email_body)
+
+def build_request(fields: dict, created_by: str, equipment: dict, team: Optional[dict]) -> MaintenanceRequest:
+    """A new request against `equipment`, with equipment and team details copied in."""
+    request = MaintenanceRequest(
+        **fields,
+        created_by=created_by,
+        equipment_name=equipment.get("name"),
+        equipment_category=equipment.get("category"),
+        team_id=equipment.get("team_id"),
+    )
+    if team:
+        request.team_name = team.get("name")
+    return request
+
 @api_router.post("/requests", response_model=MaintenanceRequest)
 async def create_request(
     request_data: MaintenanceRequestCreate, 
-    background_tasks: BackgroundTasks, 
     current_user: User = Depends(get_current_user)
 ):
-    print(f"\n[DEBUG] Create Request Triggered by user: {current_user.email}")
+    logger.debug("create_request", extra={"user_id": current_user.id, "equipment_id": request_data.equipment_id})
     
     equipment = await db.equipment.find_one({"id": request_data.equipment_id}, {"_id": 0})
     if not equipment:
-        print("[DEBUG] Error: Equipment not found")
         raise HTTPException(status_code=404, detail="Equipment not found")
     
-    request = MaintenanceRequest(
-        **request_data.model_dump(),
-        created_by=current_user.id,
-        equipment_name=equipment.get("name"),
-        equipment_category=equipment.get("category"),
-        team_id=equipment.get("team_id"),
-    )
-    
-    if request.team_id:
-        team = await db.teams.find_one({"id": request.team_id}, {"_id": 0})
-        if team:
-            request.team_name = team.get("name")
-            print(f"[DEBUG] Request assigned to Team: {team.get('name')} (ID: {request.team_id})")
-    else:
-        print("[DEBUG] No Team assigned to this equipment.")
+    team = None
+    if equipment.get("team_id"):
+        team = await db.teams.find_one({"id": equipment["team_id"]}, {"_id": 0})
+    request = build_request(request_data.model_dump(), current_user.id, equipment, team)
     
     request_dict = request.model_dump()
-    request_dict["created_at"] = request_dict["created_at"].isoformat()
-    request_dict["updated_at"] = request_dict["updated_at"].isoformat()
     
     await db.maintenance_requests.insert_one(request_dict)
+    mark_changed("maintenance_requests")
+    request_dict.pop("_id", None)
+    event_broker.publish("request.created", request_dict)
 
     # --- Notification Logic (In-App + Email) ---
-    if request.team_id:
-        team_doc = await db.teams.find_one({"id": request.team_id})
-        if team_doc and "member_ids" in team_doc:
-            print(f"[DEBUG] Found {len(team_doc['member_ids'])} members in team.")
-            
-            notifications_to_insert = []
-            recipient_emails = [] 
-            
-            for member_id in team_doc["member_ids"]:
-                if member_id == current_user.id:
-                    print(f"[DEBUG] Skipping email for user {member_id} (creator of request).")
-                    continue 
-                
-                # Fetch User Details for Email
-                member_user = await db.users.find_one({"id": member_id}, {"email": 1, "name": 1})
-                if member_user:
-                    user_email = member_user.get("email")
-                    user_name = member_user.get("name")
-                    print(f"[DEBUG] Found team member: {user_name}, Email: {user_email}")
-                    
-                    if user_email:
-                        recipient_emails.append(user_email)
-                    
-                    # In-App Notification
-                    new_notification = Notification(
-                        recipient_id=member_id,
-                        request_id=request.id,
-                        message=f"New maintenance request: {request.subject}",
-                    )
-                    notif_dict = new_notification.model_dump()
-                    notif_dict["created_at"] = notif_dict["created_at"].isoformat()
-                    notifications_to_insert.append(notif_dict)
-                else:
-                    print(f"[DEBUG] Warning: Member ID {member_id} not found in Users collection.")
-            
-            # DB Insert
-            if notifications_to_insert:
-                await db.notifications.insert_many(notifications_to_insert)
-            
-            # Email Background Task
-            if recipient_emails:
-                print(f"[DEBUG] Queueing background email to {len(recipient_emails)} recipients: {recipient_emails}")
-                email_subject = f"Maintenance Request: {request.subject}"
-                email_body = (
-                    f"Hello Team,\n\n"
-                    f"A new maintenance request has been created.\n\n"
-                    f"Equipment: {request.equipment_name}\n"
-                    f"Issue: {request.subject}\n"
-                    f"Priority: {request.request_type}\n\n"
-                    f"Please check the dashboard for details."
-                )
-                background_tasks.add_task(send_email_notification, recipient_emails, email_subject, email_body)
-            else:
-                print("[DEBUG] No valid emails found to send.")
-        else:
-            print("[DEBUG] Team document not found or has no members.")
+    side_effects = [apply_rollup_delta(db, request_contributions(request_dict))]
+    if team:
+        side_effects.append(notify_teams_of_requests([(request, team)], exclude_user_id=current_user.id))
+    else:
+        logger.debug("No team to notify", extra={"maintenance_request_id": request.id, "team_id": request.team_id})
+    await asyncio.gather(*side_effects)
     
     return request
 
-@api_router.get("/requests", response_model=List[MaintenanceRequest])
-async def get_requests(current_user: User = Depends(get_current_user)):
-    requests = await db.maintenance_requests.find({}, {"_id": 0}).to_list(1000)
-    for req in requests:
-        if isinstance(req.get("created_at"), str):
-            req["created_at"] = datetime.fromisoformat(req["created_at"])
-        if isinstance(req.get("updated_at"), str):
-            req["updated_at"] = datetime.fromisoformat(req["updated_at"])
-    return requests
+def build_request_filter(
+    stage: Optional[str] = None,
+    request_type: Optional[str] = None,
+    team_id: Optional[str] = None,
+    assigned_to: Optional[str] = None,
+    equipment_id: Optional[str] = None,
+    scheduled_from: Optional[str] = None,
+    scheduled_to: Optional[str] = None,
+) -> dict:
+    """Translate list-view filters into a Mongo query; every field here is indexed."""
+    query = {}
+    for field, value in (
+        ("stage", stage),
+        ("request_type", request_type),
+        ("team_id", team_id),
+        ("assigned_to", assigned_to),
+        ("equipment_id", equipment_id),
+    ):
+        if value is not None:
+            query[field] = value
+    # scheduled_date is stored as YYYY-MM-DD, so string comparison is date order
+    if scheduled_from or scheduled_to:
+        date_range = {}
+        if scheduled_from:
+            date_range["$gte"] = scheduled_from
+        if scheduled_to:
+            date_range["$lte"] = scheduled_to
+        query["scheduled_date"] = date_range
+    return query
+
+@api_router.get("/requests", response_model=Union[Page[MaintenanceRequest], List[MaintenanceRequest]])
+async def get_requests(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    paginate: bool = True,
+    query: dict = Depends(build_request_filter),
+    current_user: User = Depends(get_current_user),
+    cache_headers: dict = Depends(conditional_get("maintenance_requests"))
+):
+    if paginate:
+        requests, next_cursor = await fetch_page(db.maintenance_requests, query, REQUEST_PROJECTION, limit, cursor)
+        return fast_response({"items": requests, "next_cursor": next_cursor}, cache_headers)
+    return fast_response(await db.maintenance_requests.find(query, REQUEST_PROJECTION).to_list(1000), cache_headers)
 
 @api_router.get("/requests/{request_id}", response_model=MaintenanceRequest)
-async def get_request_by_id(request_id: str, current_user: User = Depends(get_current_user)):
-    request = await db.maintenance_requests.find_one({"id": request_id}, {"_id": 0})
+async def get_request_by_id(
+    request_id: str,
+    current_user: User = Depends(get_current_user),
+    cache_headers: dict = Depends(conditional_get("maintenance_requests"))
+):
+    request = await db.maintenance_requests.find_one({"id": request_id}, REQUEST_PROJECTION)
     if not request:
         raise HTTPException(status_code=404, detail="Request not found")
-    if isinstance(request.get("created_at"), str):
-        request["created_at"] = datetime.fromisoformat(request["created_at"])
-    if isinstance(request.get("updated_at"), str):
-        request["updated_at"] = datetime.fromisoformat(request["updated_at"])
-    return MaintenanceRequest(**request)
+    return fast_response(request, cache_headers)
+
+# equipment status implied by moving one of its requests into a stage
+STAGE_EQUIPMENT_STATUS = {
+    "in_progress": "maintenance",
+    "repaired": "active",
+    "scrap": "scrapped",
+}
+
+def closure_change(before: dict, after: dict, now: datetime) -> Optional[dict]:
+    """closed_at update for a write taking `before` to `after`, applied to `after` too.
+
+    A stage change into or out of repaired/scrap sets or clears it. A request
+    closed before closed_at existed gets the updated_at that rollups fall back
+    to, frozen on its first write so later edits don't move its closure day.
+    """
+    was_closed = before.get("stage") in CLOSED_STAGES
+    is_closed = after.get("stage") in CLOSED_STAGES
+    if is_closed and not was_closed:
+        after["closed_at"] = now
+        return {"closed_at": now}
+    if was_closed and not is_closed:
+        after["closed_at"] = None
+        return {"closed_at": None}
+    if was_closed and not before.get("closed_at"):
+        closed_at = before.get("updated_at") or before.get("created_at")
+        after["closed_at"] = closed_at
+        return {"closed_at": closed_at}
+    return None
+
+def request_update_document(update_data: dict, now: datetime) -> list:
+    """Pipeline update for update_data that also sets closed_at in the same write.
+
+    closed_at depends on the stage (and closed_at) the request had before
+    this write, so $cond reads the stored values (expressions in one $set
+    stage see the document as it was). closure_change computes the same
+    value from the returned pre-image.
+    """
+    was_closed = {"$in": ["$stage", list(CLOSED_STAGES)]}
+    # the closure day rollups use for a request closed before closed_at existed
+    frozen = {"$ifNull": ["$closed_at", {"$ifNull": ["$updated_at", "$created_at"]}]}
+    if "stage" not in update_data:
+        closed_at = {"$cond": [was_closed, frozen, "$closed_at"]}
+    elif update_data["stage"] in CLOSED_STAGES:
+        closed_at = {"$cond": [was_closed, frozen, {"$literal": now}]}
+    else:
+        closed_at = {"$cond": [was_closed, None, "$closed_at"]}
+    # $literal keeps user text such as "$subject" from being read as an expression
+    values = {field: {"$literal": value} for field, value in update_data.items()}
+    return [{"$set": {**values, "closed_at": closed_at}}]
+
+async def notify_assignees(assignments: List[tuple]):
+    """Notify technicians of new assignments, given (request, assignee_id) pairs.
+
+    One $in lookup for the assignees and one insert_many for the in-app
+    notifications, however many assignments are passed.
+    """
+    assignee_ids = list(dict.fromkeys(assignee_id for _, assignee_id in assignments))
+    assignees = await db.users.find(
+        {"id": {"$in": assignee_ids}}, {"_id": 0, "id": 1, "email": 1, "name": 1}
+    ).to_list(len(assignee_ids))
+    assignees_by_id = {a["id"]: a for a in assignees}
+
+    notifications_to_insert = []
+    emails = []
+    for request, assignee_id in assignments:
+        assignee = assignees_by_id.get(assignee_id)
+        if not assignee:
+            logger.warning("Assignee not found", extra={"maintenance_request_id": request["id"], "assignee_id": assignee_id})
+            continue
+
+        new_notification = Notification(
+            recipient_id=assignee["id"],
+            request_id=request["id"],
+            message=f"You have been assigned to request: {request.get('subject')}",
+        )
+        notifications_to_insert.append(new_notification.model_dump())
+
+        if assignee.get("email"):
+            email_subject = f"Assigned to Task: {request.get('subject')}"
+            email_body = (
+                f"Hello {assignee.get('name')},\n\n"
+                f"You have been assigned to a maintenance request.\n\n"
+                f"Task: {request.get('subject')}\n"
+                f"Equipment: {request.get('equipment_name')}\n"
+                f"Status: {request.get('stage')}\n\n"
+                f"Please log in to the dashboard to view details and update progress."
+            )
+            emails.append(([assignee["email"]], email_subject, email_body))
+
+    await deliver_notifications(notifications_to_insert)
+    for recipients, email_subject, email_body in emails:
+        send_email_notification(recipients, email_subject, email_body)
 
-# ==============================================================================
-# UPDATED FUNCTION: Update Request (Handles Assignment Email with DEBUG)
-# ==============================================================================
 @api_router.put("/requests/{request_id}", response_model=MaintenanceRequest)
 async def update_request(
     request_id: str, 
     request_update: MaintenanceRequestUpdate, 
-    background_tasks: BackgroundTasks, 
     current_user: User = Depends(get_current_user)
 ):
-    print(f"\n[DEBUG] Update Request Triggered for ID: {request_id}")
-    
-    existing = await db.maintenance_requests.find_one({"id": request_id}, {"_id": 0})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Request not found")
-    
-    update_data = request_update.model_dump(exclude_unset=True)
-    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
-    
-    # -------------------------------------------------------------
-    # 1. CHECK FOR NEW ASSIGNMENT AND SEND EMAIL
-    # -------------------------------------------------------------
+    """Apply the update in one atomic find_one_and_update.
+
+    When the update assigns someone, the filter also requires the stored
+    assignee to differ (the pre-image condition). Only the writer that actually
+    changes the assignee matches, so concurrent identical assignments notify
+    once. A re-assignment to the current assignee falls back to an update that
+    requires the assignee to still be that person; if another writer keeps
+    changing it between the two, the call gives up with 409.
+
+    The call returns the pre-image, which the rollups need; since the update
+    only sets fields, the post-image is the pre-image with update_data (and
+    the closed_at from closure_change) applied.
+    """
+    logger.debug("update_request", extra={"maintenance_request_id": request_id, "user_id": current_user.id})
+
+    changes = request_update.model_dump(exclude_unset=True)
+    now = datetime.now(timezone.utc)
+    update_data = {**changes, "updated_at": now}
+    update_document = request_update_document(update_data, now)
     new_assignee_id = request_update.assigned_to
-    old_assignee_id = existing.get("assigned_to")
-
-    if new_assignee_id and new_assignee_id != old_assignee_id:
-        print(f"[DEBUG] Assignment Change Detected: {old_assignee_id} -> {new_assignee_id}")
-        
-        # Fetch the Technician who was assigned
-        assignee = await db.users.find_one({"id": new_assignee_id})
-        
-        if assignee:
-            assignee_email = assignee.get("email")
-            assignee_name = assignee.get("name")
-            print(f"[DEBUG] Assignee Found: Name={assignee_name}, Email={assignee_email}")
-
-            # A. Create In-App Notification
-            new_notification = Notification(
-                recipient_id=assignee["id"],
-                request_id=request_id,
-                message=f"You have been assigned to request: {existing.get('subject')}",
-            )
-            notif_dict = new_notification.model_dump()
-            notif_dict["created_at"] = notif_dict["created_at"].isoformat()
-            await db.notifications.insert_one(notif_dict)
-
-            # B. Send Email
-            if assignee_email:
-                print(f"[DEBUG] Queueing assignment email to: {assignee_email}")
-                email_subject = f"Assigned to Task: {existing.get('subject')}"
-                email_body = (
-                    f"Hello {assignee_name},\n\n"
-                    f"You have been assigned to a maintenance request.\n\n"
-                    f"Task: {existing.get('subject')}\n"
-                    f"Equipment: {existing.get('equipment_name')}\n"
-                    f"Status: {existing.get('stage')}\n\n"
-                    f"Please log in to the dashboard to view details and update progress."
-                )
-                background_tasks.add_task(send_email_notification, [assignee_email], email_subject, email_body)
-            else:
-                print(f"[DEBUG] User {assignee_name} has no email address.")
+
+    async def apply(condition: dict) -> Optional[dict]:
+        return await db.maintenance_requests.find_one_and_update(
+            {"id": request_id, **condition},
+            update_document,
+            projection=REQUEST_PROJECTION,
+            return_document=ReturnDocument.BEFORE,
+        )
+
+    assignment_changed = False
+    if new_assignee_id:
+        for _ in range(ASSIGNMENT_UPDATE_ATTEMPTS):
+            before = await apply({"assigned_to": {"$ne": new_assignee_id}})
+            if before is not None:
+                assignment_changed = True
+                break
+            # already assigned to them: apply the rest only while that still holds
+            before = await apply({"assigned_to": new_assignee_id})
+            if before is not None:
+                break
+            if not await db.maintenance_requests.find_one({"id": request_id}, {"_id": 1}):
+                raise HTTPException(status_code=404, detail="Request not found")
         else:
-            print(f"[DEBUG] Error: User ID {new_assignee_id} not found in database.")
-    # -------------------------------------------------------------
+            raise HTTPException(status_code=409, detail="Request is being reassigned concurrently; retry")
+    else:
+        before = await apply({})
+    if not before:
+        raise HTTPException(status_code=404, detail="Request not found")
+    updated = {**before, **update_data}
+    closure_change(before, updated, now)
+
+    # Side effects only need the pre- and post-images, so they run concurrently
+    side_effects = [apply_rollup_delta(db, rollup_delta(before, updated))]
+    equipment_status = STAGE_EQUIPMENT_STATUS.get(request_update.stage)
+    if equipment_status and updated.get("equipment_id"):
+        side_effects.append(
+            db.equipment.update_one({"id": updated["equipment_id"]}, {"$set": {"status": equipment_status}})
+        )
+    if assignment_changed:
+        logger.debug("Assignment change", extra={"maintenance_request_id": request_id, "new_assignee": new_assignee_id})
+        side_effects.append(notify_assignees([(updated, new_assignee_id)]))
+    if side_effects:
+        await asyncio.gather(*side_effects)
 
-    # 2. Side Effect: Update Equipment Status on Stage Change
     if request_update.stage:
-        equipment_id = existing.get("equipment_id")
-        if equipment_id:
-            if request_update.stage == "in_progress":
-                await db.equipment.update_one({"id": equipment_id}, {"$set": {"status": "maintenance"}})
-            elif request_update.stage == "repaired":
-                await db.equipment.update_one({"id": equipment_id}, {"$set": {"status": "active"}})
-            elif request_update.stage == "scrap":
-                await db.equipment.update_one({"id": equipment_id}, {"$set": {"status": "scrapped"}})
-    
-    await db.maintenance_requests.update_one({"id": request_id}, {"$set": update_data})
-    
-    updated = await db.maintenance_requests.find_one({"id": request_id}, {"_id": 0})
-    if isinstance(updated.get("created_at"), str):
-        updated["created_at"] = datetime.fromisoformat(updated["created_at"])
-    if isinstance(updated.get("updated_at"), str):
-        updated["updated_at"] = datetime.fromisoformat(updated["updated_at"])
-    return MaintenanceRequest(**updated)
-# ==============================================================================
+        mark_changed("maintenance_requests", "equipment")
+    else:
+        mark_changed("maintenance_requests")
+
+    event_broker.publish("request.updated", {
+        "id": request_id,
+        "changes": changes,
+        "request": updated,
+    })
+    return fast_response(updated)
+
+async def apply_equipment_status_changes(requests: List[dict]):
+    """Set equipment status for requests whose stage moved; one update_many per status.
+
+    If several requests for the same asset are moved in one batch, the last
+    one in the list decides its status.
+    """
+    status_by_equipment = {}
+    for request in requests:
+        status = STAGE_EQUIPMENT_STATUS.get(request.get("stage"))
+        if status and request.get("equipment_id"):
+            status_by_equipment[request["equipment_id"]] = status
+    equipment_by_status = {}
+    for equipment_id, status in status_by_equipment.items():
+        equipment_by_status.setdefault(status, []).append(equipment_id)
+    await asyncio.gather(*(
+        db.equipment.update_many({"id": {"$in": equipment_ids}}, {"$set": {"status": status}})
+        for status, equipment_ids in equipment_by_status.items()
+    ))
+
+@api_router.post("/requests/bulk-update")
+async def bulk_update_requests(bulk: BulkRequestUpdate, current_user: User = Depends(get_current_user)):
+    """Move many kanban cards (stage and/or assignee) in one call.
+
+    Pre-images are read with one $in query and the changes written with one
+    unordered bulk_write. As in update_request, an assignment only applies if
+    the assignee is still the one we read, and a stage change only if the
+    stage is; a card moved or reassigned concurrently is reported under
+    `conflicts` and gets no side effects. Equipment status
+    changes and assignment notifications are batched across the whole call.
+    """
+    if len(bulk.items) > BULK_UPDATE_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_UPDATE_MAX_ITEMS} items per call")
+    # later entries for the same request win
+    items = {item.id: item for item in bulk.items}
+    if not items:
+        return {"matched": 0, "modified": 0, "not_found": [], "conflicts": []}
+
+    existing = await db.maintenance_requests.find({"id": {"$in": list(items)}}, REQUEST_PROJECTION).to_list(len(items))
+    existing_by_id = {doc["id"]: doc for doc in existing}
+    not_found = [request_id for request_id in items if request_id not in existing_by_id]
+
+    now = datetime.now(timezone.utc)
+    # every operation records this call's id, which identifies our writes below even
+    # if the card has been written again since; ids of a few recent calls are kept
+    bulk_id = str(uuid.uuid4())
+
+    operations = []
+    planned = {}
+    for request_id, before in existing_by_id.items():
+        changes = items[request_id].model_dump(exclude_unset=True, exclude={"id"})
+        changes = {field: value for field, value in changes.items() if value is not None}
+        if not changes:
+            continue
+        query = {"id": request_id}
+        assigning = "assigned_to" in changes and changes["assigned_to"] != before.get("assigned_to")
+        if assigning:
+            query["assigned_to"] = before.get("assigned_to")
+        if "stage" in changes:
+            # closed_at and the rollup delta are computed from this pre-image's stage
+            query["stage"] = before.get("stage")
+        after = {**before, **changes, "updated_at": now}
+        update_data = {**changes, "updated_at": now, **(closure_change(before, after, now) or {})}
+        operations.append(UpdateOne(query, {
+            "$set": update_data,
+            "$push": {"bulk_update_ids": {"$each": [bulk_id], "$slice": -BULK_UPDATE_IDS_KEPT}},
+        }))
+        planned[request_id] = (before, changes, assigning, after)
+
+    if not operations:
+        return {"matched": 0, "modified": 0, "not_found": not_found, "conflicts": []}
+
+    result = await db.maintenance_requests.bulk_write(operations, ordered=False)
+    applied = set(planned)
+    if result.matched_count < len(operations):
+        # some conditional operations lost a race; find out which by our call id
+        written = await db.maintenance_requests.find(
+            {"id": {"$in": list(planned)}, "bulk_update_ids": bulk_id}, {"_id": 0, "id": 1}
+        ).to_list(len(planned))
+        applied = {doc["id"] for doc in written}
+    conflicts = [request_id for request_id in planned if request_id not in applied]
+
+    updated = []
+    assignments = []
+    for request_id in applied:
+        before, changes, assigning, after = planned[request_id]
+        updated.append(after)
+        if assigning:
+            assignments.append((after, changes["assigned_to"]))
+
+    stage_changed = [after for after in updated if "stage" in planned[after["id"]][1]]
+    side_effects = [apply_rollup_delta(db, merge_deltas(
+        rollup_delta(planned[after["id"]][0], after) for after in stage_changed
+    ))]
+    if stage_changed:
+        side_effects.append(apply_equipment_status_changes(stage_changed))
+    if assignments:
+        side_effects.append(notify_assignees(assignments))
+    await asyncio.gather(*side_effects)
+
+    if stage_changed:
+        mark_changed("maintenance_requests", "equipment")
+    else:
+        mark_changed("maintenance_requests")
+    for after in updated:
+        changes = planned[after["id"]][1]
+        event_broker.publish("request.updated", {"id": after["id"], "changes": changes, "request": after})
+
+    logger.info("Bulk request update", extra={
+        "user_id": current_user.id, "requested": len(items), "modified": result.modified_count,
+        "conflicts": len(conflicts), "not_found": len(not_found),
+    })
+    return {
+        "matched": result.matched_count,
+        "modified": result.modified_count,
+        "not_found": not_found,
+        "conflicts": conflicts,
+    }
 
 @api_router.delete("/requests/{request_id}")
 async def delete_request(request_id: str, current_user: User = Depends(get_current_user)):
-    result = await db.maintenance_requests.delete_one({"id": request_id})
-    if result.deleted_count == 0:
+    deleted = await db.maintenance_requests.find_one_and_delete({"id": request_id}, projection=REQUEST_PROJECTION)
+    if not deleted:
         raise HTTPException(status_code=404, detail="Request not found")
+    await apply_rollup_delta(db, rollup_delta(deleted, None))
+    mark_changed("maintenance_requests")
+    event_broker.publish("request.deleted", {"id": request_id})
     return {"message": "Request deleted"}
 
+# Recurring maintenance plans (maintenance_plans.py): the scheduler hands due
+# plans over in batches and they become ordinary preventive requests here.
+async def materialize_plan_requests(plans: List[dict]) -> int:
+    """Create the requests for a batch of due plans; returns how many were new.
+
+    Assets and teams for the whole batch come from two $in queries. Requests
+    carry a plan_key, unique per (plan, asset, date), so occurrences already
+    written by an earlier attempt are rejected by the index and skipped.
+    """
+    equipment_ids = list({plan["equipment_id"] for plan in plans if plan.get("equipment_id")})
+    categories = list({plan["category"] for plan in plans if plan.get("category") and not plan.get("equipment_id")})
+    equipment = await db.equipment.find(
+        {"$or": [{"id": {"$in": equipment_ids}}, {"category": {"$in": categories}}], "status": {"$ne": "scrapped"}},
+        {"_id": 0, "id": 1, "name": 1, "category": 1, "team_id": 1},
+    ).to_list(None)
+    equipment_by_id = {eq["id"]: eq for eq in equipment}
+    equipment_by_category = defaultdict(list)
+    for eq in equipment:
+        equipment_by_category[eq.get("category")].append(eq)
+
+    team_ids = list({eq["team_id"] for eq in equipment if eq.get("team_id")})
+    teams = await db.teams.find(
+        {"id": {"$in": team_ids}}, {"_id": 0, "id": 1, "name": 1, "member_ids": 1}
+    ).to_list(len(team_ids))
+    teams_by_id = {team["id"]: team for team in teams}
+
+    pending = []
+    for plan in plans:
+        if plan.get("equipment_id"):
+            targets = [equipment_by_id[plan["equipment_id"]]] if plan["equipment_id"] in equipment_by_id else []
+        else:
+            targets = equipment_by_category.get(plan.get("category"), [])
+        for eq in targets:
+            team = teams_by_id.get(eq.get("team_id"))
+            request = build_request({
+                "subject": plan["subject"],
+                "description": plan.get("description"),
+                "equipment_id": eq["id"],
+                "request_type": "preventive",
+                "scheduled_date": plan["next_due"],
+                "plan_id": plan["id"],
+            }, plan["created_by"], eq, team)
+            request_dict = request.model_dump()
+            request_dict["plan_key"] = plan_key(plan["id"], eq["id"], plan["next_due"])
+            pending.append((request, team, request_dict))
+    if not pending:
+        return 0
+
+    try:
+        await db.maintenance_requests.insert_many([doc for _, _, doc in pending], ordered=False)
+        inserted = pending
+    except BulkWriteError as e:
+        failed = set()
+        for write_error in e.details.get("writeErrors", []):
+            failed.add(write_error["index"])
+            if write_error.get("code") != 11000:
+                logger.error("Planned request not written", extra={
+                    "plan_key": pending[write_error["index"]][2]["plan_key"], "error": write_error.get("errmsg"),
+                })
+        inserted = [item for index, item in enumerate(pending) if index not in failed]
+    if not inserted:
+        return 0
+
+    mark_changed("maintenance_requests")
+    for _, _, request_dict in inserted:
+        request_dict.pop("_id", None)
+        # plan_key only serves the unique index; events carry the MaintenanceRequest fields
+        request_dict.pop("plan_key", None)
+        event_broker.publish("request.created", request_dict)
+    await asyncio.gather(
+        apply_rollup_delta(db, merge_deltas(request_contributions(doc) for _, _, doc in inserted)),
+        notify_teams_of_requests([(request, team) for request, team, _ in inserted if team]),
+    )
+    return len(inserted)
+
+plan_scheduler = PlanScheduler(
+    db,
+    materialize_plan_requests,
+    lead_days=PM_LEAD_DAYS,
+    batch_size=PM_BATCH_SIZE,
+    reload_seconds=PM_RELOAD_SECONDS,
+)
+
+async def prepare_plan(plan_data: MaintenancePlanCreate) -> dict:
+    """Validate a plan's target and recurrence; returns the fields to store, including next_due."""
+    if bool(plan_data.equipment_id) == bool(plan_data.category):
+        raise HTTPException(status_code=400, detail="Set exactly one of equipment_id or category")
+    if bool(plan_data.interval_days) == bool(plan_data.day_of_month):
+        raise HTTPException(status_code=400, detail="Set exactly one of interval_days or day_of_month")
+    try:
+        date.fromisoformat(plan_data.start_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start_date must be YYYY-MM-DD")
+    if plan_data.equipment_id and not await db.equipment.find_one({"id": plan_data.equipment_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Equipment not found")
+
+    fields = plan_data.model_dump()
+    # occurrences already generated for today or later keep their requests: plan_key dedupes them
+    fields["next_due"] = occurrence_on_or_after(fields, datetime.now(timezone.utc).date()).isoformat()
+    return fields
+
+@api_router.post("/maintenance-plans", response_model=MaintenancePlan)
+async def create_maintenance_plan(plan_data: MaintenancePlanCreate, current_user: User = Depends(get_current_user)):
+    plan = MaintenancePlan(**await prepare_plan(plan_data), created_by=current_user.id)
+    plan_dict = plan.model_dump()
+    await db.maintenance_plans.insert_one(plan_dict)
+    mark_changed("maintenance_plans")
+    plan_scheduler.schedule(plan_dict)
+    return plan
+
+@api_router.get("/maintenance-plans", response_model=Page[MaintenancePlan])
+async def get_maintenance_plans(
+    equipment_id: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    cache_headers: dict = Depends(conditional_get("maintenance_plans"))
+):
+    query = {}
+    if equipment_id:
+        query["equipment_id"] = equipment_id
+    if category:
+        query["category"] = category
+    plans, next_cursor = await fetch_page(db.maintenance_plans, query, {"_id": 0}, limit, cursor)
+    return fast_response({"items": plans, "next_cursor": next_cursor}, cache_headers)
+
+@api_router.get("/maintenance-plans/{plan_id}", response_model=MaintenancePlan)
+async def get_maintenance_plan(
+    plan_id: str,
+    current_user: User = Depends(get_current_user),
+    cache_headers: dict = Depends(conditional_get("maintenance_plans"))
+):
+    plan = await db.maintenance_plans.find_one({"id": plan_id}, {"_id": 0})
+    if not plan:
+        raise HTTPException(status_code=404, detail="Maintenance plan not found")
+    return fast_response(plan, cache_headers)
+
+@api_router.put("/maintenance-plans/{plan_id}", response_model=MaintenancePlan)
+async def update_maintenance_plan(
+    plan_id: str, plan_data: MaintenancePlanCreate, current_user: User = Depends(get_current_user)
+):
+    update_data = await prepare_plan(plan_data)
+    update_data["updated_at"] = datetime.now(timezone.utc)
+    updated = await db.maintenance_plans.find_one_and_update(
+        {"id": plan_id}, {"$set": update_data}, projection={"_id": 0}, return_document=ReturnDocument.AFTER,
+    )
+    if not updated:
+        raise HTTPException(status_code=404, detail="Maintenance plan not found")
+    mark_changed("maintenance_plans")
+    plan_scheduler.schedule(updated)
+    return fast_response(updated)
+
+@api_router.delete("/maintenance-plans/{plan_id}")
+async def delete_maintenance_plan(plan_id: str, current_user: User = Depends(get_current_user)):
+    result = await db.maintenance_plans.delete_one({"id": plan_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Maintenance plan not found")
+    mark_changed("maintenance_plans")
+    plan_scheduler.remove(plan_id)
+    return {"message": "Maintenance plan deleted"}
+
 # 8. Notification Routes
 @api_router.get("/notifications", response_model=List[Notification])
 async def get_my_notifications(current_user: User = Depends(get_current_user)):
@@ -573,47 +1378,507 @@ async def get_my_notifications(current_user: User = Depends(get_current_user)):
         {"_id": 0}
     ).sort("created_at", -1).to_list(50)
     
-    for note in notifications:
-        if isinstance(note.get("created_at"), str):
-            note["created_at"] = datetime.fromisoformat(note["created_at"])
-    return notifications
+    return fast_response(notifications)
+
+@api_router.get("/notifications/email-stats")
+async def get_email_stats(current_user: User = Depends(get_current_user)):
+    if email_worker is None:
+        return {"enabled": False}
+    return {"enabled": True, **email_worker.stats()}
+
+@api_router.get("/notifications/unread-count")
+async def get_unread_count(current_user: User = Depends(get_current_user)):
+    # a single point read of the user's counter, however many notifications they have
+    return {"unread": await unread_count(db, current_user.id)}
+
+def read_fields(now: datetime) -> dict:
+    """Fields set on a notification as it is read, starting its retention clock."""
+    fields = {"is_read": True, "read_at": now}
+    if NOTIFICATION_RETENTION_DAYS > 0:
+        fields["expire_at"] = now + timedelta(days=NOTIFICATION_RETENTION_DAYS)
+    return fields
+
+@api_router.put("/notifications/read-all")
+async def mark_all_notifications_read(current_user: User = Depends(get_current_user)):
+    result = await db.notifications.update_many(
+        {"recipient_id": current_user.id, "is_read": False},
+        {"$set": read_fields(datetime.now(timezone.utc))}
+    )
+    await adjust_unread(db, {current_user.id: -result.modified_count})
+    return {"message": "Marked all as read", "marked": result.modified_count}
 
 @api_router.put("/notifications/{notification_id}/read")
 async def mark_notification_read(notification_id: str, current_user: User = Depends(get_current_user)):
-    result = await db.notifications.update_one(
-        {"id": notification_id, "recipient_id": current_user.id},
-        {"$set": {"is_read": True}}
+    before = await db.notifications.find_one_and_update(
+        {"id": notification_id, "recipient_id": current_user.id, "is_read": False},
+        {"$set": read_fields(datetime.now(timezone.utc))},
+        projection={"_id": 0, "id": 1},
     )
-    if result.matched_count == 0:
+    if before is not None:
+        await adjust_unread(db, {current_user.id: -1})
+    elif not await db.notifications.find_one({"id": notification_id, "recipient_id": current_user.id}, {"_id": 1}):
         raise HTTPException(status_code=404, detail="Notification not found")
     return {"message": "Marked as read"}
 
-# 9. Dashboard Stats Route
-@api_router.get("/dashboard/stats")
-async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
-    total_equipment = await db.equipment.count_documents({})
-    total_teams = await db.teams.count_documents({})
-    total_requests = await db.maintenance_requests.count_documents({})
-    
-    new_requests = await db.maintenance_requests.count_documents({"stage": "new"})
-    in_progress_requests = await db.maintenance_requests.count_documents({"stage": "in_progress"})
-    repaired_requests = await db.maintenance_requests.count_documents({"stage": "repaired"})
-    
-    corrective = await db.maintenance_requests.count_documents({"request_type": "corrective"})
-    preventive = await db.maintenance_requests.count_documents({"request_type": "preventive"})
-    
+# 9. Dashboard, Analytics & Search Routes
+_dashboard_stats_cache = {"value": None, "expires_at": 0.0, "generation": 0}
+_dashboard_stats_lock = asyncio.Lock()
+
+def invalidate_dashboard_stats():
+    """Drop the cached stats; mark_changed() calls this when requests, equipment or teams change."""
+    _dashboard_stats_cache["value"] = None
+    _dashboard_stats_cache["generation"] += 1
+
+async def compute_dashboard_stats() -> dict:
+    pipeline = [{
+        "$facet": {
+            "total": [{"$count": "count"}],
+            "by_stage": [{"$group": {"_id": "$stage", "count": {"$sum": 1}}}],
+            "by_type": [{"$group": {"_id": "$request_type", "count": {"$sum": 1}}}],
+        }
+    }]
+    facets, total_equipment, total_teams = await asyncio.gather(
+        db.maintenance_requests.aggregate(pipeline).to_list(1),
+        db.equipment.estimated_document_count(),
+        db.teams.estimated_document_count(),
+    )
+    facets = facets[0] if facets else {}
+    total = facets.get("total") or [{"count": 0}]
+    by_stage = {row["_id"]: row["count"] for row in facets.get("by_stage", [])}
+    by_type = {row["_id"]: row["count"] for row in facets.get("by_type", [])}
+
     return {
         "total_equipment": total_equipment,
         "total_teams": total_teams,
-        "total_requests": total_requests,
-        "new_requests": new_requests,
-        "in_progress_requests": in_progress_requests,
-        "repaired_requests": repaired_requests,
-        "corrective_requests": corrective,
-        "preventive_requests": preventive
+        "total_requests": total[0]["count"],
+        "new_requests": by_stage.get("new", 0),
+        "in_progress_requests": by_stage.get("in_progress", 0),
+        "repaired_requests": by_stage.get("repaired", 0),
+        "corrective_requests": by_type.get("corrective", 0),
+        "preventive_requests": by_type.get("preventive", 0)
     }
 
-# 10. App Assembly
+@api_router.get("/dashboard/stats")
+async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
+    cache = _dashboard_stats_cache
+    if cache["value"] is not None and cache["expires_at"] > time.monotonic():
+        return cache["value"]
+
+    # Only one coroutine recomputes; the rest wait and reuse its result
+    async with _dashboard_stats_lock:
+        if cache["value"] is not None and cache["expires_at"] > time.monotonic():
+            return cache["value"]
+        generation = cache["generation"]
+        stats = await compute_dashboard_stats()
+        # A write landed while we were aggregating; serve the result but don't cache it
+        if generation == cache["generation"]:
+            cache["value"] = stats
+            cache["expires_at"] = time.monotonic() + DASHBOARD_STATS_TTL_SECONDS
+        return stats
+
+# analytics dimension -> rollup field
+ANALYTICS_DIMENSIONS = {"team": "team_id", "category": "equipment_category", "equipment": "equipment_id"}
+
+@api_router.get("/analytics/requests")
+async def get_request_analytics(
+    group_by: Optional[str] = Query(None, pattern="^(team|category|equipment)$"),
+    bucket: str = Query("month", pattern="^(day|week|month|year|total)$"),
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    team_id: Optional[str] = None,
+    category: Optional[str] = None,
+    equipment_id: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    # rows are labelled with current team and equipment names
+    cache_headers: dict = Depends(conditional_get("maintenance_requests", "teams", "equipment"))
+):
+    """Request volume, MTTR and repair-vs-scrap by date bucket and optional dimension.
+
+    Served from the daily request_rollups documents (see analytics.py), so the
+    cost depends on days x assets in range, not on the number of requests.
+    Dates are YYYY-MM-DD (UTC) and inclusive.
+    """
+    match = {}
+    for field, value in (("team_id", team_id), ("equipment_category", category), ("equipment_id", equipment_id)):
+        if value is not None:
+            match[field] = value
+    if date_from or date_to:
+        match["day"] = {}
+        if date_from:
+            match["day"]["$gte"] = date_from
+        if date_to:
+            match["day"]["$lte"] = date_to
+
+    dimension = ANALYTICS_DIMENSIONS.get(group_by)
+    rows = await db.request_rollups.aggregate(analytics_pipeline(match, dimension, bucket)).to_list(None)
+    rows = [finish_row(row) for row in rows]
+
+    # label team and equipment ids with their current names
+    if dimension in ("team_id", "equipment_id"):
+        collection = db.teams if dimension == "team_id" else db.equipment
+        ids = list({row.get(dimension) for row in rows if row.get(dimension)})
+        names = {
+            doc["id"]: doc.get("name")
+            for doc in await collection.find({"id": {"$in": ids}}, {"_id": 0, "id": 1, "name": 1}).to_list(len(ids))
+        }
+        for row in rows:
+            row["name"] = names.get(row.get(dimension))
+
+    return fast_response({"group_by": group_by, "bucket": bucket, "rows": rows}, cache_headers)
+
+# serial number hits outrank any text score so typeahead on a scanned label lands first
+SERIAL_EXACT_SCORE = 100.0
+SERIAL_PREFIX_SCORE = 50.0
+
+async def search_equipment_text(q: str, limit: int) -> list:
+    cursor = db.equipment.find(
+        {"$text": {"$search": q}},
+        {"_id": 0, "id": 1, "name": 1, "serial_number": 1, "category": 1, "location": 1,
+         "score": {"$meta": "textScore"}},
+    ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+    return await cursor.to_list(limit)
+
+async def search_serial_prefix(q: str, limit: int) -> list:
+    # anchored, case-sensitive patterns are range scans on the serial_number index
+    patterns = [re.compile("^" + re.escape(variant)) for variant in dict.fromkeys((q, q.upper()))]
+    cursor = db.equipment.find(
+        {"serial_number": {"$in": patterns}},
+        {"_id": 0, "id": 1, "name": 1, "serial_number": 1, "category": 1, "location": 1},
+    ).sort("serial_number", 1).limit(limit)
+    rows = await cursor.to_list(limit)
+    for row in rows:
+        exact = row.get("serial_number", "").upper() == q.upper()
+        row["score"] = SERIAL_EXACT_SCORE if exact else SERIAL_PREFIX_SCORE
+    return rows
+
+async def search_requests_text(q: str, limit: int) -> list:
+    cursor = db.maintenance_requests.find(
+        {"$text": {"$search": q}},
+        {"_id": 0, "id": 1, "subject": 1, "equipment_name": 1, "stage": 1, "score": {"$meta": "textScore"}},
+    ).sort([("score", {"$meta": "textScore"})]).limit(limit)
+    return await cursor.to_list(limit)
+
+@api_router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    types: List[str] = Query(["equipment", "requests"]),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user),
+    cache_headers: dict = Depends(conditional_get("equipment", "maintenance_requests"))
+):
+    """Ranked hits across equipment and requests, for the global search box.
+
+    Equipment is matched by serial_number prefix and by the search_text index
+    on equipment and maintenance_requests (whole words, stemmed); every source
+    is an index-bounded query capped at offset + limit rows, run concurrently.
+    """
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Query must not be blank")
+    unknown = set(types) - {"equipment", "requests"}
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search types: {', '.join(sorted(unknown))}")
+    if offset > SEARCH_MAX_OFFSET:
+        raise HTTPException(status_code=400, detail=f"offset may not exceed {SEARCH_MAX_OFFSET}")
+
+    # one extra row per source tells us whether another page exists
+    window = offset + limit + 1
+    searches = []
+    if "equipment" in types:
+        searches += [search_serial_prefix(q, window), search_equipment_text(q, window)]
+    if "requests" in types:
+        searches.append(search_requests_text(q, window))
+    results = await asyncio.gather(*searches)
+
+    hits = {}
+    equipment_results = results[:2] if "equipment" in types else []
+    request_results = results[-1:] if "requests" in types else []
+    for rows in equipment_results:
+        for row in rows:
+            hit = {"type": "equipment", "id": row["id"], "title": row.get("name"),
+                   "subtitle": " · ".join(filter(None, (row.get("serial_number"), row.get("location")))),
+                   "score": row["score"]}
+            previous = hits.get(("equipment", row["id"]))
+            if previous is None or previous["score"] < hit["score"]:
+                hits[("equipment", row["id"])] = hit
+    for rows in request_results:
+        for row in rows:
+            hits[("request", row["id"])] = {
+                "type": "request", "id": row["id"], "title": row.get("subject"),
+                "subtitle": " · ".join(filter(None, (row.get("equipment_name"), row.get("stage")))),
+                "score": row["score"],
+            }
+
+    ranked = sorted(hits.values(), key=lambda hit: (-hit["score"], hit["type"], hit["id"]))
+    page = ranked[offset:offset + limit]
+    for hit in page:
+        hit["score"] = round(hit["score"], 3)
+    next_offset = offset + limit if len(ranked) > offset + limit and offset + limit <= SEARCH_MAX_OFFSET else None
+    return fast_response({"items": page, "next_offset": next_offset}, cache_headers)
+
+# 10. Bulk Import Routes
+async def insert_import_chunk(collection, chunk: list, report: ImportReport) -> list:
+    """insert_many one chunk of (row_number, doc) pairs, recording per-row failures.
+
+    Returns the documents that were inserted.
+    """
+    if not chunk:
+        return []
+    docs = [doc for _, doc in chunk]
+    try:
+        result = await collection.insert_many(docs, ordered=False)
+        report.inserted += len(result.inserted_ids)
+        return docs
+    except BulkWriteError as e:
+        report.inserted += e.details.get("nInserted", 0)
+        failed = set()
+        for write_error in e.details.get("writeErrors", []):
+            failed.add(write_error["index"])
+            report.error(chunk[write_error["index"]][0], write_error.get("errmsg", "Write failed"))
+        return [doc for index, doc in enumerate(docs) if index not in failed]
+
+async def denormalize_request_chunk(chunk: list, report: ImportReport) -> list:
+    """Fill equipment/team fields for a chunk of imported requests with two $in lookups."""
+    equipment_ids = list({doc["equipment_id"] for _, doc in chunk})
+    equipment = await db.equipment.find(
+        {"id": {"$in": equipment_ids}}, {"_id": 0, "id": 1, "name": 1, "category": 1, "team_id": 1}
+    ).to_list(len(equipment_ids))
+    equipment_by_id = {eq["id"]: eq for eq in equipment}
+
+    team_ids = list({eq["team_id"] for eq in equipment if eq.get("team_id")})
+    teams = await db.teams.find({"id": {"$in": team_ids}}, {"_id": 0, "id": 1, "name": 1}).to_list(len(team_ids))
+    team_names = {team["id"]: team["name"] for team in teams}
+
+    ready = []
+    for row_number, doc in chunk:
+        eq = equipment_by_id.get(doc["equipment_id"])
+        if not eq:
+            report.error(row_number, "Equipment not found")
+            continue
+        doc["equipment_name"] = eq.get("name")
+        doc["equipment_category"] = eq.get("category")
+        doc["team_id"] = eq.get("team_id")
+        doc["team_name"] = team_names.get(eq.get("team_id"))
+        ready.append((row_number, doc))
+    return ready
+
+async def run_import(request: Request, fmt: Optional[str], build_doc, collection, prepare_chunk=None,
+                     after_insert=None) -> dict:
+    """Stream the request body, validate row by row and insert in IMPORT_CHUNK_SIZE batches."""
+    try:
+        fmt = detect_format(request.headers.get("content-type"), fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    report = ImportReport()
+
+    async def flush(chunk):
+        if prepare_chunk is not None:
+            chunk = await prepare_chunk(chunk, report)
+        inserted = await insert_import_chunk(collection, chunk, report)
+        if after_insert is not None and inserted:
+            await after_insert(inserted)
+
+    chunk = []
+    try:
+        async for row_number, record in iter_records(request.stream(), fmt):
+            report.received += 1
+            if isinstance(record, ValueError):
+                report.error(row_number, str(record))
+                continue
+            try:
+                chunk.append((row_number, build_doc(record)))
+            except ValidationError as e:
+                report.error(row_number, format_validation_error(e))
+                continue
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                await flush(chunk)
+                chunk = []
+        await flush(chunk)
+    except ValueError as e:
+        # the body itself is malformed; rows already inserted stay inserted
+        report.aborted = str(e)
+
+    if report.inserted:
+        mark_changed(collection.name)
+    return report.as_dict()
+
+@api_router.post("/import/equipment")
+async def import_equipment(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format"),
+    current_user: User = Depends(get_current_user)
+):
+    """Bulk-load equipment from an NDJSON or CSV body (one asset per row)."""
+    def build_doc(record: dict) -> dict:
+        return Equipment(**record).model_dump()
+
+    return await run_import(request, fmt, build_doc, db.equipment)
+
+@api_router.post("/import/requests")
+async def import_requests(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format"),
+    current_user: User = Depends(get_current_user)
+):
+    """Bulk-load maintenance requests (e.g. history) from an NDJSON or CSV body.
+
+    Equipment and team names are filled in from equipment_id; no notifications
+    or emails are sent for imported rows.
+    """
+    def build_doc(record: dict) -> dict:
+        record.setdefault("created_by", current_user.id)
+        return MaintenanceRequest(**record).model_dump()
+
+    async def update_rollups(docs: list):
+        await apply_rollup_delta(db, merge_deltas(request_contributions(doc) for doc in docs))
+
+    return await run_import(
+        request, fmt, build_doc, db.maintenance_requests, denormalize_request_chunk, after_insert=update_rollups,
+    )
+
+# 11. Export Routes
+def export_response(collection, query: dict, model, fmt: Optional[str], name: str) -> StreamingResponse:
+    """Stream every matching document straight from a Mongo cursor as NDJSON or CSV."""
+    fmt = (fmt or "ndjson").lower()
+    if fmt not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    fields = list(model.model_fields)
+    cursor = collection.find(query, {"_id": 0}, batch_size=EXPORT_BATCH_SIZE)
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        encode_records(cursor, fmt, fields, EXPORT_BATCH_SIZE),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+@api_router.get("/export/requests")
+async def export_requests(
+    fmt: Optional[str] = Query(None, alias="format"),
+    query: dict = Depends(build_request_filter),
+    current_user: User = Depends(get_current_user)
+):
+    """Maintenance history export; accepts the same filters as GET /requests."""
+    return export_response(db.maintenance_requests, query, MaintenanceRequest, fmt, "maintenance_requests")
+
+@api_router.get("/export/equipment")
+async def export_equipment(
+    fmt: Optional[str] = Query(None, alias="format"),
+    current_user: User = Depends(get_current_user)
+):
+    return export_response(db.equipment, {}, Equipment, fmt, "equipment")
+
+@api_router.get("/export/notifications")
+async def export_notifications(
+    fmt: Optional[str] = Query(None, alias="format"),
+    current_user: User = Depends(get_current_user)
+):
+    # like GET /notifications, only ever the caller's own
+    return export_response(db.notifications, {"recipient_id": current_user.id}, Notification, fmt, "notifications")
+
+# 12. Event Stream Route
+@api_router.get("/events")
+async def stream_events(
+    request: Request,
+    token: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+):
+    """Server-sent events: notifications for the caller plus request created/updated/deleted.
+
+    Browsers' EventSource cannot set headers, so the JWT may also be passed as
+    ?token=. A comment line is sent every SSE_HEARTBEAT_SECONDS to keep idle
+    connections open through proxies.
+    """
+    if credentials is not None:
+        token = credentials.credentials
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    user = await user_from_token(token)
+    subscription = event_broker.subscribe(user.id)
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                message = await subscription.next_message(SSE_HEARTBEAT_SECONDS)
+                if message is None:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                else:
+                    yield message
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@api_router.get("/events/stats")
+async def get_event_stats(current_user: User = Depends(get_current_user)):
+    return event_broker.stats()
+
+# 13. Background Job Routes
+@api_router.get("/jobs/propagation")
+async def get_propagation_jobs(
+    source_id: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    query = {"source_id": source_id} if source_id else {}
+    jobs = await db.propagation_jobs.find(query, {"_id": 0}).sort("created_at", -1).to_list(limit)
+    return fast_response(jobs)
+
+@api_router.get("/jobs/propagation/{job_id}")
+async def get_propagation_job(job_id: str, current_user: User = Depends(get_current_user)):
+    job = await db.propagation_jobs.find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return fast_response(job)
+
+@api_router.get("/jobs/maintenance-plans")
+async def get_plan_scheduler_stats(current_user: User = Depends(get_current_user)):
+    return {"enabled": PM_SCHEDULER_ENABLED, **plan_scheduler.stats()}
+
+# 14. Metrics Route
+metrics_registry.add_callback(stats_callback(
+    "email", "Background email delivery",
+    lambda: email_worker.stats() if email_worker is not None else None,
+    counters=["enqueued", "sent", "coalesced", "retried", "failed", "dropped"],
+    gauges=["queue_depth", "pending_retries"],
+))
+metrics_registry.add_callback(stats_callback(
+    "sse", "Server-sent event broker", event_broker.stats,
+    counters=["published", "dropped"], gauges=["connections"],
+))
+metrics_registry.add_callback(stats_callback(
+    "user_cache", "Authenticated user cache", user_cache.stats,
+    counters=["hits", "misses"], gauges=["size"],
+))
+metrics_registry.add_callback(stats_callback(
+    "password_hash", "bcrypt executor", lambda: password_hash_stats,
+    counters=["completed", "rejected"], gauges=["running", "queued"],
+))
+metrics_registry.add_callback(stats_callback(
+    "propagation", "Rename propagation jobs", propagation_runner.stats, gauges=["running"],
+))
+metrics_registry.add_callback(stats_callback(
+    "maintenance_plans", "Recurring maintenance plan scheduler", plan_scheduler.stats,
+    counters=["batches", "occurrences", "requests_created", "failures"], gauges=["plans"],
+))
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# 15. App Assembly
 app.include_router(api_router)
 
 app.add_middleware(
@@ -624,12 +1889,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+
+if PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        output_dir=PROFILE_DIR,
+        token=PROFILE_TOKEN,
+        sample_rate=PROFILE_SAMPLE_RATE,
+        interval_ms=PROFILE_INTERVAL_MS,
+    )
+
+app.add_middleware(RequestIdMiddleware)
+
+@app.on_event("startup")
+async def ensure_db_indexes():
+    if ENSURE_INDEXES_ON_STARTUP:
+        await ensure_indexes(db)
+
+@app.on_event("startup")
+async def start_email_worker():
+    if email_worker is not None:
+        await email_worker.start()
+
+@app.on_event("startup")
+async def resume_propagation_jobs():
+    await propagation_runner.resume_pending()
+
+@app.on_event("startup")
+async def start_plan_scheduler():
+    if PM_SCHEDULER_ENABLED:
+        await plan_scheduler.start()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await plan_scheduler.stop()
+    await propagation_runner.stop()
+    if email_worker is not None:
+        await email_worker.stop()
+    client.close()
+    _password_executor.shutdown(wait=False)
+    shutdown_logging()
\ No newline at end of file
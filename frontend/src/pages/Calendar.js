@@ -10,16 +10,23 @@ export default function Calendar() {
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    fetchRequests();
-  }, []);
+    fetchRequests(currentDate);
+  }, [currentDate]);
 
-  const fetchRequests = async () => {
+  const fetchRequests = async (date) => {
+    // Only ask the server for the month being displayed
+    const firstDay = new Date(date.getFullYear(), date.getMonth(), 1);
+    const lastDay = new Date(date.getFullYear(), date.getMonth() + 1, 0);
     try {
-      const response = await axiosInstance.get('/requests');
-      const preventiveRequests = response.data.filter(
-        (req) => req.request_type === 'preventive' && req.scheduled_date
-      );
-      setRequests(preventiveRequests);
+      const response = await axiosInstance.get('/requests', {
+        params: {
+          paginate: false,
+          request_type: 'preventive',
+          scheduled_from: firstDay.toISOString().split('T')[0],
+          scheduled_to: lastDay.toISOString().split('T')[0],
+        },
+      });
+      setRequests(response.data);
     } catch {
       toast.error('Failed to load calendar');
     } finally {
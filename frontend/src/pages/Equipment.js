@@ -33,7 +33,7 @@ export default function Equipment() {
 
   const fetchEquipment = async () => {
     try {
-      const response = await axiosInstance.get('/equipment');
+      const response = await axiosInstance.get('/equipment', { params: { paginate: false } });
       setEquipment(response.data);
     } catch (error) {
       toast.error('Failed to load equipment');
@@ -44,7 +44,7 @@ export default function Equipment() {
 
   const fetchTeams = async () => {
     try {
-      const response = await axiosInstance.get('/teams');
+      const response = await axiosInstance.get('/teams', { params: { paginate: false } });
       setTeams(response.data);
     } catch (error) {
       console.error('Failed to load teams');
@@ -124,7 +124,7 @@ export default function Equipment() {
 
   const fetchEquipmentRequests = async (equipmentId) => {
     try {
-      const response = await axiosInstance.get(`/equipment/${equipmentId}/requests`);
+      const response = await axiosInstance.get(`/equipment/${equipmentId}/requests`, { params: { paginate: false } });
       return response.data;
     } catch (error) {
       console.error('Failed to load equipment requests');
@@ -40,7 +40,7 @@ export default function Requests() {
 
   const fetchRequests = async () => {
     try {
-      const response = await axiosInstance.get('/requests');
+      const response = await axiosInstance.get('/requests', { params: { paginate: false } });
       setRequests(response.data);
     } catch (error) {
       toast.error('Failed to load requests');
@@ -51,7 +51,7 @@ export default function Requests() {
 
   const fetchEquipment = async () => {
     try {
-      const response = await axiosInstance.get('/equipment');
+      const response = await axiosInstance.get('/equipment', { params: { paginate: false } });
       setEquipment(response.data);
     } catch (error) {
       console.error('Failed to load equipment');
@@ -60,7 +60,7 @@ export default function Requests() {
 
   const fetchUsers = async () => {
     try {
-      const response = await axiosInstance.get('/users');
+      const response = await axiosInstance.get('/users', { params: { paginate: false } });
       setUsers(response.data);
     } catch (error) {
       console.error('Failed to load users');
@@ -27,7 +27,7 @@ export default function Teams() {
 
   const fetchTeams = async () => {
     try {
-      const response = await axiosInstance.get('/teams');
+      const response = await axiosInstance.get('/teams', { params: { paginate: false } });
       setTeams(response.data);
     } catch (error) {
       toast.error('Failed to load teams');
@@ -38,7 +38,7 @@ export default function Teams() {
 
   const fetchUsers = async () => {
     try {
-      const response = await axiosInstance.get('/users');
+      const response = await axiosInstance.get('/users', { params: { paginate: false } });
       setUsers(response.data);
     } catch (error) {
       console.error('Failed to load users');
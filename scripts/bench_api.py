@@ -0,0 +1,659 @@
+"""Load-test every API route and record per-endpoint latency percentiles.
+
+Seeds a synthetic dataset (see bench_dataset.py) straight into a throwaway
+MongoDB database, or into an in-memory mongomock stand-in with --memory,
+then drives each route with `--concurrency` concurrent clients for
+`--iterations` calls. By default the app runs in-process over httpx's ASGI
+transport, so no server needs to be started; --base-url points the run at
+a live uvicorn instead (it must use the same BENCH_DB_NAME).
+
+For each endpoint the run records p50/p95/p99/max latency, throughput and
+status codes, and writes them to a JSON file so two commits can be
+compared:
+
+    python scripts/bench_api.py --memory --equipment 2000 --requests 20000
+    BENCH_MONGO_URL=mongodb://localhost:27017 python scripts/bench_api.py \\
+        --equipment 100000 --requests 1000000 --concurrency 32 --iterations 500
+    python scripts/bench_api.py --compare bench-results/before.json bench-results/after.json
+
+The long-lived GET /events stream is not benchmarked (its stats route is),
+and /search needs a real MongoDB: mongomock has no $text, so --memory
+skips it.
+Email is disabled and the bench database is dropped afterwards unless
+--keep is given.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = REPO_DIR / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+os.environ["DB_NAME"] = os.environ.get("BENCH_DB_NAME", "gearguard_bench")
+os.environ["MONGO_URL"] = os.environ.get("BENCH_MONGO_URL", "mongodb://localhost:27017")
+os.environ["SMTP_USER"] = ""
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - only needed for this script
+    sys.exit("bench_api.py needs httpx (pip install httpx)")
+
+from analytics import rebuild_rollups  # noqa: E402
+from bench_dataset import CATEGORIES, ISSUES, Dataset, DatasetSizes, add_size_arguments, generate  # noqa: E402
+
+SCENARIOS = []
+
+
+def scenario(name: str, max_iterations: int = None, memory: bool = True):
+    """Register `fn(client, ctx) -> httpx.Response` as a benchmarked endpoint.
+
+    memory=False marks routes mongomock cannot serve (e.g. $text search);
+    they are skipped under --memory.
+    """
+    def register(fn):
+        SCENARIOS.append((name, fn, max_iterations, memory))
+        return fn
+    return register
+
+
+class Context:
+    """Dataset ids plus rows created during the run, shared by scenarios."""
+
+    def __init__(self, data, headers: dict, seed: int):
+        self.data = data
+        self.headers = headers
+        self.rng = random.Random(seed)
+        self.created_requests = []
+        self.created_equipment = []
+        self.created_teams = []
+        self.propagation_jobs = []
+        self.created_plans = []
+        self.own_notification_ids = []
+        self.etags = {}
+
+    def pick(self, ids):
+        return self.rng.choice(ids)
+
+    def pop(self, created, fallback):
+        return created.pop() if created else self.pick(fallback)
+
+
+# -- reads ---------------------------------------------------------------------
+
+@scenario("POST /auth/login")
+async def login(client, ctx):
+    index = ctx.rng.randrange(len(ctx.data.user_ids))
+    return await client.post("/api/auth/login", json={"email": f"user{index}@bench.local", "password": "bench"})
+
+
+@scenario("GET /auth/me")
+async def auth_me(client, ctx):
+    return await client.get("/api/auth/me", headers=ctx.headers)
+
+
+@scenario("GET /auth/cache-stats")
+async def auth_cache_stats(client, ctx):
+    return await client.get("/api/auth/cache-stats", headers=ctx.headers)
+
+
+@scenario("GET /auth/hasher-stats")
+async def auth_hasher_stats(client, ctx):
+    return await client.get("/api/auth/hasher-stats", headers=ctx.headers)
+
+
+@scenario("GET /equipment")
+async def list_equipment(client, ctx):
+    return await client.get("/api/equipment", params={"limit": 50}, headers=ctx.headers)
+
+
+@scenario("GET /equipment?paginate=false")
+async def list_equipment_legacy(client, ctx):
+    return await client.get("/api/equipment", params={"paginate": "false"}, headers=ctx.headers)
+
+
+@scenario("GET /equipment/{id}")
+async def get_equipment(client, ctx):
+    return await client.get(f"/api/equipment/{ctx.pick(ctx.data.equipment_ids)}", headers=ctx.headers)
+
+
+@scenario("GET /equipment/{id}/requests")
+async def equipment_requests(client, ctx):
+    return await client.get(f"/api/equipment/{ctx.pick(ctx.data.equipment_ids)}/requests", headers=ctx.headers)
+
+
+@scenario("GET /teams")
+async def list_teams(client, ctx):
+    return await client.get("/api/teams", headers=ctx.headers)
+
+
+@scenario("GET /teams/{id}")
+async def get_team(client, ctx):
+    return await client.get(f"/api/teams/{ctx.pick(ctx.data.team_ids)}", headers=ctx.headers)
+
+
+@scenario("GET /users")
+async def list_users(client, ctx):
+    return await client.get("/api/users", headers=ctx.headers)
+
+
+@scenario("GET /requests")
+async def list_requests(client, ctx):
+    return await client.get("/api/requests", params={"limit": 50}, headers=ctx.headers)
+
+
+@scenario("GET /requests (If-None-Match)")
+async def list_requests_conditional(client, ctx):
+    etag = ctx.etags.get("requests")
+    if etag is None:
+        response = await client.get("/api/requests", params={"limit": 50}, headers=ctx.headers)
+        ctx.etags["requests"] = response.headers.get("etag")
+        return response
+    return await client.get("/api/requests", params={"limit": 50}, headers={**ctx.headers, "If-None-Match": etag})
+
+
+@scenario("GET /requests?stage=")
+async def list_requests_by_stage(client, ctx):
+    stage = ctx.rng.choice(["new", "in_progress", "repaired", "scrap"])
+    return await client.get("/api/requests", params={"stage": stage, "limit": 50}, headers=ctx.headers)
+
+
+@scenario("GET /requests?team_id=")
+async def list_requests_by_team(client, ctx):
+    params = {"team_id": ctx.pick(ctx.data.team_ids), "limit": 50}
+    return await client.get("/api/requests", params=params, headers=ctx.headers)
+
+
+@scenario("GET /requests (calendar month)")
+async def calendar_month(client, ctx):
+    start = datetime.now(timezone.utc).date().replace(day=1) - timedelta(days=30 * ctx.rng.randrange(24))
+    start = start.replace(day=1)
+    params = {
+        "request_type": "preventive",
+        "scheduled_from": start.isoformat(),
+        "scheduled_to": (start + timedelta(days=31)).isoformat(),
+        "paginate": "false",
+    }
+    return await client.get("/api/requests", params=params, headers=ctx.headers)
+
+
+@scenario("GET /requests/{id}")
+async def get_request(client, ctx):
+    return await client.get(f"/api/requests/{ctx.pick(ctx.data.request_ids)}", headers=ctx.headers)
+
+
+@scenario("GET /notifications")
+async def list_notifications(client, ctx):
+    return await client.get("/api/notifications", headers=ctx.headers)
+
+
+@scenario("GET /notifications/unread-count")
+async def unread_count(client, ctx):
+    return await client.get("/api/notifications/unread-count", headers=ctx.headers)
+
+
+@scenario("GET /notifications/email-stats")
+async def email_stats(client, ctx):
+    return await client.get("/api/notifications/email-stats", headers=ctx.headers)
+
+
+@scenario("GET /dashboard/stats")
+async def dashboard_stats(client, ctx):
+    return await client.get("/api/dashboard/stats", headers=ctx.headers)
+
+
+@scenario("GET /analytics/requests (team x month)")
+async def analytics_by_team(client, ctx):
+    params = {"group_by": "team", "bucket": "month"}
+    return await client.get("/api/analytics/requests", params=params, headers=ctx.headers)
+
+
+@scenario("GET /analytics/requests (category x day)")
+async def analytics_by_category(client, ctx):
+    since = (datetime.now(timezone.utc) - timedelta(days=90)).date().isoformat()
+    params = {"group_by": "category", "bucket": "day", "from": since}
+    return await client.get("/api/analytics/requests", params=params, headers=ctx.headers)
+
+
+@scenario("GET /search (serial prefix)", memory=False)
+async def search_serial(client, ctx):
+    # typeahead on a scanned label: SN-<CAT>-<index>, a few characters at a time
+    prefix = f"SN-{ctx.rng.choice(CATEGORIES)[:3].upper()}-{ctx.rng.randrange(len(ctx.data.equipment_ids)):08d}"
+    params = {"q": prefix[:ctx.rng.randint(7, len(prefix))]}
+    return await client.get("/api/search", params=params, headers=ctx.headers)
+
+
+@scenario("GET /search (words)", memory=False)
+async def search_words(client, ctx):
+    params = {"q": ctx.rng.choice(ISSUES), "limit": 20, "offset": ctx.rng.choice([0, 20])}
+    return await client.get("/api/search", params=params, headers=ctx.headers)
+
+
+@scenario("GET /export/requests?equipment_id=", max_iterations=50)
+async def export_requests(client, ctx):
+    params = {"equipment_id": ctx.pick(ctx.data.equipment_ids), "format": "ndjson"}
+    return await client.get("/api/export/requests", params=params, headers=ctx.headers)
+
+
+@scenario("GET /export/equipment", max_iterations=5)
+async def export_equipment(client, ctx):
+    return await client.get("/api/export/equipment", params={"format": "csv"}, headers=ctx.headers)
+
+
+@scenario("GET /export/notifications", max_iterations=50)
+async def export_notifications(client, ctx):
+    return await client.get("/api/export/notifications", headers=ctx.headers)
+
+
+@scenario("GET /maintenance-plans")
+async def list_plans(client, ctx):
+    return await client.get("/api/maintenance-plans", params={"limit": 50}, headers=ctx.headers)
+
+
+@scenario("GET /jobs/maintenance-plans")
+async def plan_scheduler_stats(client, ctx):
+    return await client.get("/api/jobs/maintenance-plans", headers=ctx.headers)
+
+
+@scenario("GET /events/stats")
+async def event_stats(client, ctx):
+    return await client.get("/api/events/stats", headers=ctx.headers)
+
+
+@scenario("GET /metrics")
+async def metrics(client, ctx):
+    token = os.environ.get("METRICS_TOKEN")
+    return await client.get("/metrics", headers={"Authorization": f"Bearer {token}"} if token else {})
+
+
+# -- writes --------------------------------------------------------------------
+
+@scenario("POST /auth/register")
+async def register(client, ctx):
+    body = {"email": f"{uuid.uuid4().hex}@bench.local", "password": "bench", "name": "Bench Signup"}
+    return await client.post("/api/auth/register", json=body)
+
+
+@scenario("POST /equipment")
+async def create_equipment(client, ctx):
+    body = {
+        "name": f"Bench Asset {uuid.uuid4().hex[:8]}",
+        "serial_number": f"BENCH-{uuid.uuid4().hex[:12]}",
+        "category": "Machinery",
+        "team_id": ctx.pick(ctx.data.team_ids),
+    }
+    response = await client.post("/api/equipment", json=body, headers=ctx.headers)
+    if response.status_code == 200:
+        ctx.created_equipment.append(response.json()["id"])
+    return response
+
+
+@scenario("PUT /equipment/{id} (rename)")
+async def rename_equipment(client, ctx):
+    equipment_id = ctx.pick(ctx.data.equipment_ids)
+    current = (await client.get(f"/api/equipment/{equipment_id}", headers=ctx.headers)).json()
+    body = {**current, "name": f"{current['name'].split(' #')[0]} #{ctx.rng.randrange(1000)}"}
+    response = await client.put(f"/api/equipment/{equipment_id}", json=body, headers=ctx.headers)
+    if response.headers.get("x-propagation-job"):
+        ctx.propagation_jobs.append(response.headers["x-propagation-job"])
+    return response
+
+
+@scenario("GET /jobs/propagation/{id}")
+async def propagation_job(client, ctx):
+    if not ctx.propagation_jobs:
+        return await client.get("/api/jobs/propagation", headers=ctx.headers)
+    return await client.get(f"/api/jobs/propagation/{ctx.pick(ctx.propagation_jobs)}", headers=ctx.headers)
+
+
+@scenario("POST /teams")
+async def create_team(client, ctx):
+    body = {"name": f"Bench Team {uuid.uuid4().hex[:8]}", "member_ids": ctx.rng.sample(ctx.data.user_ids, 5)}
+    response = await client.post("/api/teams", json=body, headers=ctx.headers)
+    if response.status_code == 200:
+        ctx.created_teams.append(response.json()["id"])
+    return response
+
+
+@scenario("PUT /teams/{id}")
+async def update_team(client, ctx):
+    team_id = ctx.pick(ctx.created_teams or ctx.data.team_ids)
+    body = {"name": f"Bench Team {uuid.uuid4().hex[:8]}", "member_ids": ctx.rng.sample(ctx.data.user_ids, 5)}
+    return await client.put(f"/api/teams/{team_id}", json=body, headers=ctx.headers)
+
+
+@scenario("POST /requests")
+async def create_request(client, ctx):
+    body = {
+        "subject": "Bench request",
+        "equipment_id": ctx.pick(ctx.data.equipment_ids),
+        "request_type": ctx.rng.choice(["corrective", "preventive"]),
+    }
+    response = await client.post("/api/requests", json=body, headers=ctx.headers)
+    if response.status_code == 200:
+        ctx.created_requests.append(response.json()["id"])
+    return response
+
+
+@scenario("PUT /requests/{id} (stage)")
+async def move_request(client, ctx):
+    body = {"stage": ctx.rng.choice(["new", "in_progress", "repaired"])}
+    return await client.put(f"/api/requests/{ctx.pick(ctx.data.request_ids)}", json=body, headers=ctx.headers)
+
+
+@scenario("PUT /requests/{id} (assign)")
+async def assign_request(client, ctx):
+    body = {"assigned_to": ctx.pick(ctx.data.user_ids)}
+    return await client.put(f"/api/requests/{ctx.pick(ctx.data.request_ids)}", json=body, headers=ctx.headers)
+
+
+@scenario("POST /requests/bulk-update (50 cards)")
+async def bulk_move(client, ctx):
+    ids = ctx.rng.sample(ctx.data.request_ids, min(50, len(ctx.data.request_ids)))
+    stage = ctx.rng.choice(["new", "in_progress", "repaired"])
+    body = {"items": [{"id": request_id, "stage": stage} for request_id in ids]}
+    return await client.post("/api/requests/bulk-update", json=body, headers=ctx.headers)
+
+
+def plan_body(ctx) -> dict:
+    body = {"name": "Bench plan", "subject": "Bench preventive check",
+            "start_date": datetime.now(timezone.utc).date().isoformat()}
+    if ctx.rng.random() < 0.5:
+        body["equipment_id"] = ctx.pick(ctx.data.equipment_ids)
+    else:
+        body["category"] = ctx.rng.choice(CATEGORIES)
+    if ctx.rng.random() < 0.5:
+        body["interval_days"] = ctx.rng.choice([7, 30, 90])
+    else:
+        body["day_of_month"] = ctx.rng.randint(1, 31)
+    return body
+
+
+@scenario("POST /maintenance-plans")
+async def create_plan(client, ctx):
+    response = await client.post("/api/maintenance-plans", json=plan_body(ctx), headers=ctx.headers)
+    if response.status_code == 200:
+        ctx.created_plans.append(response.json()["id"])
+    return response
+
+
+async def existing_plan(client, ctx) -> str:
+    # the dataset has no plans; when run alone (--only), make one first
+    if not ctx.created_plans:
+        await create_plan(client, ctx)
+    return ctx.pick(ctx.created_plans)
+
+
+@scenario("GET /maintenance-plans/{id}")
+async def get_plan(client, ctx):
+    return await client.get(f"/api/maintenance-plans/{await existing_plan(client, ctx)}", headers=ctx.headers)
+
+
+@scenario("PUT /maintenance-plans/{id}")
+async def update_plan(client, ctx):
+    return await client.put(f"/api/maintenance-plans/{await existing_plan(client, ctx)}", json=plan_body(ctx),
+                            headers=ctx.headers)
+
+
+@scenario("PUT /notifications/{id}/read")
+async def read_notification(client, ctx):
+    # only the recipient may mark a notification read
+    notification_id = ctx.pick(ctx.own_notification_ids or ctx.data.notification_ids)
+    return await client.put(f"/api/notifications/{notification_id}/read", headers=ctx.headers)
+
+
+@scenario("PUT /notifications/read-all")
+async def read_all_notifications(client, ctx):
+    return await client.put("/api/notifications/read-all", headers=ctx.headers)
+
+
+@scenario("POST /import/equipment (100 rows)", max_iterations=50)
+async def import_equipment(client, ctx):
+    rows = [
+        json.dumps({"name": f"Imported {i}", "serial_number": f"IMP-{uuid.uuid4().hex[:12]}", "category": "Tools"})
+        for i in range(100)
+    ]
+    headers = {**ctx.headers, "Content-Type": "application/x-ndjson"}
+    return await client.post("/api/import/equipment", content="\n".join(rows), headers=headers)
+
+
+@scenario("POST /import/requests (100 rows)", max_iterations=50)
+async def import_requests(client, ctx):
+    rows = [
+        json.dumps({"subject": f"Imported {i}", "equipment_id": ctx.pick(ctx.data.equipment_ids),
+                    "request_type": "corrective"})
+        for i in range(100)
+    ]
+    headers = {**ctx.headers, "Content-Type": "application/x-ndjson"}
+    return await client.post("/api/import/requests", content="\n".join(rows), headers=headers)
+
+
+@scenario("DELETE /requests/{id}")
+async def delete_request(client, ctx):
+    request_id = ctx.pop(ctx.created_requests, ctx.data.request_ids)
+    return await client.delete(f"/api/requests/{request_id}", headers=ctx.headers)
+
+
+@scenario("DELETE /maintenance-plans/{id}")
+async def delete_plan(client, ctx):
+    plan_id = await existing_plan(client, ctx)
+    ctx.created_plans.remove(plan_id)
+    return await client.delete(f"/api/maintenance-plans/{plan_id}", headers=ctx.headers)
+
+
+@scenario("DELETE /equipment/{id}")
+async def delete_equipment(client, ctx):
+    equipment_id = ctx.pop(ctx.created_equipment, ctx.data.equipment_ids)
+    return await client.delete(f"/api/equipment/{equipment_id}", headers=ctx.headers)
+
+
+@scenario("DELETE /teams/{id}")
+async def delete_team(client, ctx):
+    team_id = ctx.pop(ctx.created_teams, ctx.data.team_ids)
+    return await client.delete(f"/api/teams/{team_id}", headers=ctx.headers)
+
+
+# -- runner --------------------------------------------------------------------
+
+def percentile(latencies, p):
+    if not latencies:
+        return None
+    return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+
+async def run_scenario(client, fn, ctx, iterations: int, concurrency: int) -> dict:
+    calls = iter(range(iterations))
+    latencies = []
+    statuses = Counter()
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for _ in calls:
+            start = time.perf_counter()
+            try:
+                response = await fn(client, ctx)
+                status = response.status_code
+            except Exception as e:  # a crashed call still counts against the endpoint
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[str(status)] += 1
+            if not isinstance(status, int) or status >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": round(latencies[-1], 3) if latencies else None,
+        "status_codes": dict(statuses),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results: dict):
+    print(f"{'endpoint':<40} {'calls':>6} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in results.items():
+        print(f"{name:<40} {row['calls']:>6} {row['errors']:>5} {row['throughput_rps'] or 0:>9.1f} "
+              f"{row['p50_ms'] or 0:>9.2f} {row['p95_ms'] or 0:>9.2f} {row['p99_ms'] or 0:>9.2f}")
+
+
+def compare(before_path: str, after_path: str):
+    before = json.loads(Path(before_path).read_text())
+    after = json.loads(Path(after_path).read_text())
+    print(f"{before['meta']['commit']} -> {after['meta']['commit']}")
+    print(f"{'endpoint':<40} {'p50 ms':>17} {'p95 ms':>17} {'p99 ms':>17}")
+    for name, row in after["results"].items():
+        old = before["results"].get(name)
+        if old is None:
+            print(f"{name:<40} (new)")
+            continue
+        cells = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if old[key] and row[key]:
+                cells.append(f"{row[key]:>8.2f} ({(row[key] - old[key]) / old[key] * 100:+5.0f}%)")
+            else:
+                cells.append(f"{'-':>17}")
+        print(f"{name:<40} {' '.join(cells)}")
+
+
+async def main(args):
+    import server
+
+    if args.memory:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--memory needs mongomock-motor (pip install mongomock-motor)")
+        server.client = AsyncMongoMockClient(tz_aware=True)
+        server.db = server.client[os.environ["DB_NAME"]]
+        server.propagation_runner.db = server.db
+        server.plan_scheduler.db = server.db
+    db = server.db
+
+    sizes = DatasetSizes(args.users, args.teams, args.equipment, args.requests, args.notifications)
+    try:
+        if not args.skip_seed:
+            await server.client.drop_database(os.environ["DB_NAME"])
+            if not args.memory:
+                await server.ensure_indexes(db)
+            print(f"Seeding {os.environ['DB_NAME']}{' (in memory)' if args.memory else ''}")
+            data = await generate(db, sizes, server.hash_password("bench"), seed=args.seed, batch_size=args.batch_size)
+            # the generator writes requests directly, so derive their analytics rollups
+            await rebuild_rollups(db, batch_size=args.batch_size)
+        else:
+            data = await load_ids(db)
+
+        manager = await db.users.find_one({"id": data.user_ids[0]}, {"_id": 0})
+        headers = {"Authorization": f"Bearer {server.create_token(manager['id'], manager['email'])}"}
+        ctx = Context(data, headers, args.seed)
+        ctx.own_notification_ids = [
+            doc["id"] async for doc in db.notifications.find({"recipient_id": manager["id"]}, {"_id": 0, "id": 1})
+        ]
+
+        if args.base_url:
+            client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+        else:
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://bench", timeout=60)
+
+        selected = [s for s in SCENARIOS if not args.only or any(term in s[0] for term in args.only)]
+        if args.memory:
+            skipped = [s[0] for s in selected if not s[3]]
+            if skipped:
+                print(f"Skipped under --memory: {', '.join(skipped)}")
+            selected = [s for s in selected if s[3]]
+        results = {}
+        async with client:
+            for name, fn, max_iterations, _ in selected:
+                iterations = min(args.iterations, max_iterations) if max_iterations else args.iterations
+                results[name] = await run_scenario(client, fn, ctx, iterations, args.concurrency)
+                row = results[name]
+                print(f"  {name:<40} p50 {row['p50_ms'] or 0:8.2f} ms  p99 {row['p99_ms'] or 0:8.2f} ms  "
+                      f"{row['errors']} errors")
+        await server.propagation_runner.stop()
+    finally:
+        if not args.keep and not args.memory:
+            await server.client.drop_database(os.environ["DB_NAME"])
+        server.client.close()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "target": args.base_url or ("in-process, mongomock" if args.memory else f"in-process, {os.environ['MONGO_URL']}"),
+            "concurrency": args.concurrency,
+            "iterations": args.iterations,
+            "dataset": vars(sizes),
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+    output = Path(args.output) if args.output else (
+        REPO_DIR / "bench-results" / f"api-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{report['meta']['commit']}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print()
+    print_results(results)
+    print(f"\nResults written to {output}")
+
+
+async def load_ids(db):
+    """Rebuild the id lists from an already-seeded database (--skip-seed)."""
+    async def ids(collection, query=None):
+        return [doc["id"] async for doc in db[collection].find(query or {}, {"_id": 0, "id": 1})]
+
+    return Dataset(
+        user_ids=await ids("users", {"email": {"$regex": r"^user\d+@bench\.local$"}}),
+        team_ids=await ids("teams"),
+        equipment_ids=await ids("equipment"),
+        request_ids=await ids("maintenance_requests"),
+        notification_ids=await ids("notifications"),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_size_arguments(parser)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--iterations", type=int, default=200, help="calls per endpoint")
+    parser.add_argument("--only", nargs="+", help="run endpoints whose name contains any of these")
+    parser.add_argument("--memory", action="store_true", help="use an in-memory mongomock database")
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the data already in BENCH_DB_NAME")
+    parser.add_argument("--keep", action="store_true", help="do not drop the bench database afterwards")
+    parser.add_argument("--output", help="results file (default bench-results/api-<time>-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="diff two results files and exit")
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+    else:
+        asyncio.run(main(args))
@@ -0,0 +1,246 @@
+"""Generate a realistic synthetic GearGuard dataset straight into MongoDB.
+
+Documents have the same shape server.py writes (uuids, BSON dates,
+denormalized equipment/team names on requests) and are inserted with
+insert_many in batches, so a million rows load in minutes without going
+through the API. The distributions are loosely modelled on a plant:
+a few busy assets collect most requests, most requests are closed, and
+preventive work carries a scheduled_date.
+
+    python scripts/bench_dataset.py --equipment 10000 --requests 100000
+    BENCH_MONGO_URL=mongodb://localhost:27017 BENCH_DB_NAME=gearguard_bench \\
+        python scripts/bench_dataset.py --equipment 500000 --requests 1000000 --drop
+
+scripts/bench_api.py uses generate() to seed its database before a run.
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+CATEGORIES = ["Machinery", "Electrical", "HVAC", "Vehicles", "IT Equipment", "Plumbing", "Tools"]
+DEPARTMENTS = ["Production", "Assembly", "Logistics", "Facilities", "Quality", "Office"]
+LOCATIONS = ["Plant A", "Plant B", "Warehouse", "Building 1", "Building 2", "Yard"]
+ISSUES = ["Leaking seal", "Overheating", "Unusual vibration", "Calibration drift", "Belt worn",
+          "Filter replacement", "Firmware update", "Pressure drop", "Noisy bearing", "Routine inspection"]
+STAGES = ["new", "in_progress", "repaired", "scrap"]
+STAGE_WEIGHTS = [15, 20, 60, 5]
+
+# how far back created_at timestamps go
+HISTORY_DAYS = 730
+
+
+@dataclass
+class DatasetSizes:
+    users: int = 1000
+    teams: int = 50
+    equipment: int = 10000
+    requests: int = 100000
+    notifications: int = 100000
+
+
+@dataclass
+class Dataset:
+    """Ids of what was generated, for scenarios to sample from."""
+    user_ids: List[str] = field(default_factory=list)
+    team_ids: List[str] = field(default_factory=list)
+    equipment_ids: List[str] = field(default_factory=list)
+    request_ids: List[str] = field(default_factory=list)
+    notification_ids: List[str] = field(default_factory=list)
+
+
+def _created_at(rng: random.Random, now: datetime) -> datetime:
+    # BSON dates keep milliseconds
+    created = now - timedelta(seconds=rng.randint(0, HISTORY_DAYS * 86400), milliseconds=rng.randint(0, 999))
+    return created.replace(microsecond=created.microsecond // 1000 * 1000)
+
+
+async def _insert(collection, docs_iter, batch_size: int, label: str):
+    batch = []
+    inserted = 0
+    started = time.perf_counter()
+    for doc in docs_iter:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            await collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    print(f"  {label:<14} {inserted:>9} rows in {time.perf_counter() - started:6.1f}s")
+
+
+async def generate(db, sizes: DatasetSizes, password_hash: str, seed: int = 42, batch_size: int = 5000) -> Dataset:
+    """Insert users, teams, equipment, requests and notifications; returns their ids.
+
+    Every generated user gets `password_hash`, so any of them can log in.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    data = Dataset()
+
+    data.user_ids = [str(uuid.uuid4()) for _ in range(sizes.users)]
+    data.team_ids = [str(uuid.uuid4()) for _ in range(max(1, sizes.teams))]
+    team_names = {team_id: f"{rng.choice(CATEGORIES)} Team {i}" for i, team_id in enumerate(data.team_ids)}
+    team_members = {team_id: [] for team_id in data.team_ids}
+    user_team = {}
+    for user_id in data.user_ids:
+        team_id = rng.choice(data.team_ids)
+        team_members[team_id].append(user_id)
+        user_team[user_id] = team_id
+
+    await _insert(db.users, (
+        {
+            "id": user_id,
+            "email": f"user{i}@bench.local",
+            "name": f"Bench User {i}",
+            "role": "manager" if i % 20 == 0 else "technician",
+            "team_id": user_team[user_id],
+            "password": password_hash,
+            "created_at": _created_at(rng, now),
+        }
+        for i, user_id in enumerate(data.user_ids)
+    ), batch_size, "users")
+
+    await _insert(db.teams, (
+        {
+            "id": team_id,
+            "name": team_names[team_id],
+            "description": "Synthetic benchmark team",
+            "member_ids": team_members[team_id],
+            "created_at": _created_at(rng, now),
+        }
+        for team_id in data.team_ids
+    ), batch_size, "teams")
+
+    data.equipment_ids = [str(uuid.uuid4()) for _ in range(sizes.equipment)]
+    equipment_meta = {}
+
+    def equipment_docs():
+        for i, equipment_id in enumerate(data.equipment_ids):
+            category = rng.choice(CATEGORIES)
+            team_id = rng.choice(data.team_ids)
+            name = f"{category} Unit {i:06d}"
+            equipment_meta[equipment_id] = (name, category, team_id)
+            purchased = now - timedelta(days=rng.randint(30, 3650))
+            yield {
+                "id": equipment_id,
+                "name": name,
+                "serial_number": f"SN-{category[:3].upper()}-{i:08d}",
+                "category": category,
+                "department": rng.choice(DEPARTMENTS),
+                "assigned_employee": None,
+                "team_id": team_id,
+                "location": rng.choice(LOCATIONS),
+                "purchase_date": purchased.date().isoformat(),
+                "warranty_expiry": (purchased + timedelta(days=730)).date().isoformat(),
+                "status": rng.choices(["active", "maintenance", "scrapped"], [85, 10, 5])[0],
+                "created_at": _created_at(rng, now),
+            }
+
+    await _insert(db.equipment, equipment_docs(), batch_size, "equipment")
+
+    data.request_ids = [str(uuid.uuid4()) for _ in range(sizes.requests)]
+
+    def request_docs():
+        for request_id in data.request_ids:
+            # a hot 5% of assets collects about half of all requests
+            if rng.random() < 0.5:
+                equipment_id = data.equipment_ids[rng.randrange(max(1, len(data.equipment_ids) // 20))]
+            else:
+                equipment_id = rng.choice(data.equipment_ids)
+            name, category, team_id = equipment_meta[equipment_id]
+            stage = rng.choices(STAGES, STAGE_WEIGHTS)[0]
+            request_type = "preventive" if rng.random() < 0.35 else "corrective"
+            created = _created_at(rng, now)
+            members = team_members[team_id]
+            yield {
+                "id": request_id,
+                "subject": f"{rng.choice(ISSUES)} on {name}",
+                "description": "Generated for benchmarking.",
+                "equipment_id": equipment_id,
+                "equipment_name": name,
+                "equipment_category": category,
+                "team_id": team_id,
+                "team_name": team_names[team_id],
+                "assigned_to": rng.choice(members) if members and stage != "new" else None,
+                "request_type": request_type,
+                "stage": stage,
+                "scheduled_date": (created + timedelta(days=rng.randint(0, 60))).date().isoformat()
+                if request_type == "preventive" else None,
+                "duration": round(rng.uniform(0.5, 16), 1) if stage in ("repaired", "scrap") else None,
+                "created_by": rng.choice(data.user_ids),
+                "created_at": created,
+                "updated_at": created + timedelta(hours=rng.randint(0, 240)),
+            }
+
+    if data.equipment_ids:
+        await _insert(db.maintenance_requests, request_docs(), batch_size, "requests")
+    else:
+        data.request_ids = []
+
+    data.notification_ids = [str(uuid.uuid4()) for _ in range(sizes.notifications if data.request_ids else 0)]
+    unread = Counter()
+
+    def notification_docs():
+        for notification_id in data.notification_ids:
+            doc = {
+                "id": notification_id,
+                "recipient_id": rng.choice(data.user_ids),
+                "message": "New maintenance request: synthetic",
+                "request_id": rng.choice(data.request_ids),
+                "is_read": rng.random() < 0.7,
+                "created_at": _created_at(rng, now),
+            }
+            if not doc["is_read"]:
+                unread[doc["recipient_id"]] += 1
+            yield doc
+
+    await _insert(db.notifications, notification_docs(), batch_size, "notifications")
+    # the API serves unread badges from per-user counters kept beside the notifications
+    await _insert(db.notification_counters, (
+        {"_id": recipient_id, "unread": count} for recipient_id, count in unread.items()
+    ), batch_size, "unread counts")
+    return data
+
+
+async def main(args):
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from passlib.context import CryptContext
+
+    client = AsyncIOMotorClient(os.environ.get("BENCH_MONGO_URL", "mongodb://localhost:27017"), tz_aware=True)
+    db_name = os.environ.get("BENCH_DB_NAME", "gearguard_bench")
+    try:
+        if args.drop:
+            await client.drop_database(db_name)
+        password_hash = CryptContext(schemes=["bcrypt"]).hash("bench")
+        sizes = DatasetSizes(args.users, args.teams, args.equipment, args.requests, args.notifications)
+        print(f"Generating into {db_name} (every user's password is 'bench')")
+        await generate(client[db_name], sizes, password_hash, seed=args.seed, batch_size=args.batch_size)
+    finally:
+        client.close()
+
+
+def add_size_arguments(parser: argparse.ArgumentParser):
+    defaults = DatasetSizes()
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--teams", type=int, default=defaults.teams)
+    parser.add_argument("--equipment", type=int, default=defaults.equipment)
+    parser.add_argument("--requests", type=int, default=defaults.requests)
+    parser.add_argument("--notifications", type=int, default=defaults.notifications)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_size_arguments(parser)
+    parser.add_argument("--drop", action="store_true", help="drop the bench database first")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,80 @@
+"""Benchmark create_request latency as the assigned team grows.
+
+Seeds a throwaway database with one team of N technicians and one piece of
+equipment, then times the create_request handler directly (no HTTP) so the
+numbers reflect the notification fan-out and nothing else.
+
+    python scripts/bench_request_fanout.py
+    BENCH_MONGO_URL=mongodb://localhost:27017 python scripts/bench_request_fanout.py --sizes 5 50 500
+
+The bench database is dropped afterwards. Email is disabled for the run.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ["DB_NAME"] = os.environ.get("BENCH_DB_NAME", "gearguard_bench")
+os.environ["MONGO_URL"] = os.environ.get("BENCH_MONGO_URL", "mongodb://localhost:27017")
+os.environ["SMTP_USER"] = ""
+
+import server  # noqa: E402
+
+
+async def seed(team_size: int):
+    db = server.db
+    await db.users.delete_many({})
+    await db.teams.delete_many({})
+    await db.equipment.delete_many({})
+
+    members = [
+        {"id": str(uuid.uuid4()), "email": f"tech{i}@bench.local", "name": f"Tech {i}", "role": "technician"}
+        for i in range(team_size)
+    ]
+    await db.users.insert_many(members)
+    team_id = str(uuid.uuid4())
+    await db.teams.insert_one({"id": team_id, "name": "Bench Team", "member_ids": [m["id"] for m in members]})
+    equipment_id = str(uuid.uuid4())
+    await db.equipment.insert_one({
+        "id": equipment_id, "name": "Bench Press", "serial_number": "BENCH-1",
+        "category": "Machinery", "team_id": team_id,
+    })
+    creator = server.User(email="creator@bench.local", name="Creator", role="manager")
+    return equipment_id, creator
+
+
+async def run(sizes, iterations):
+    await server.ensure_indexes(server.db)
+    print(f"{'team size':>10} {'median ms':>10} {'p95 ms':>10}")
+    try:
+        for size in sizes:
+            equipment_id, creator = await seed(size)
+            payload = server.MaintenanceRequestCreate(
+                subject="Bench request", equipment_id=equipment_id, request_type="corrective",
+            )
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                await server.create_request(payload, current_user=creator)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(0.95 * len(timings)))]
+            print(f"{size:>10} {statistics.median(timings):>10.2f} {p95:>10.2f}")
+    finally:
+        await server.client.drop_database(os.environ["DB_NAME"])
+        server.client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 200, 500])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes, args.iterations))
@@ -0,0 +1,93 @@
+"""Compare CPU time of the two ways server.py can serialize a list response.
+
+  pydantic  what FastAPI does with response_model=List[MaintenanceRequest]:
+            validate every row, dump it to JSON-able python, then json.dumps
+  fast      FAST_JSON_RESPONSES: orjson straight from the Mongo documents
+
+No database is needed; rows are synthesized with the same shape as stored
+maintenance_requests documents.
+
+    python scripts/bench_serialization.py --rows 1000 --iterations 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "gearguard_bench")
+
+from pydantic import TypeAdapter  # noqa: E402
+
+import server  # noqa: E402
+
+
+def make_rows(count: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "subject": f"Request {i}",
+            "description": "Hydraulic pressure drops under load; inspect seals and pump.",
+            "equipment_id": str(uuid.uuid4()),
+            "equipment_name": f"CNC Machine {i % 50:02d}",
+            "equipment_category": "Machinery",
+            "team_id": str(uuid.uuid4()),
+            "team_name": "Mechanics Team",
+            "assigned_to": str(uuid.uuid4()),
+            "request_type": "corrective" if i % 3 else "preventive",
+            "stage": ("new", "in_progress", "repaired", "scrap")[i % 4],
+            "scheduled_date": "2025-01-15",
+            "duration": 2.5,
+            "created_by": str(uuid.uuid4()),
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def time_cpu(fn, iterations: int) -> float:
+    """Average CPU milliseconds per call."""
+    fn()  # warm up
+    start = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - start) * 1000 / iterations
+
+
+def main(rows: int, iterations: int):
+    docs = make_rows(rows)
+    adapter = TypeAdapter(List[server.MaintenanceRequest])
+
+    def pydantic_path():
+        validated = adapter.validate_python(docs)
+        content = adapter.dump_python(validated, mode="json")
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+    def fast_path():
+        return server.FastJSONResponse(docs).body
+
+    if server.orjson is None:
+        sys.exit("orjson is not installed; the fast path is unavailable")
+
+    slow = time_cpu(pydantic_path, iterations)
+    fast = time_cpu(fast_path, iterations)
+    print(f"rows={rows} iterations={iterations}")
+    print(f"pydantic response_model: {slow:8.3f} ms CPU/request")
+    print(f"orjson fast path:        {fast:8.3f} ms CPU/request  ({slow / fast:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark list response serialization.")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    main(args.rows, args.iterations)
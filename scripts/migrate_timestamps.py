@@ -0,0 +1,116 @@
+"""Convert ISO-string timestamps to native BSON dates.
+
+Older documents store created_at / updated_at as ISO strings. The API now
+writes BSON dates and no longer converts on read, and keyset pagination and
+notification sorting need every document on the same type. This walks each
+collection in _id order, rewriting string timestamps in batches with
+bulk_write. Progress is checkpointed in the `migrations` collection after
+every batch, so an interrupted run picks up where it stopped:
+
+    python scripts/migrate_timestamps.py
+    python scripts/migrate_timestamps.py --batch-size 5000 --dry-run
+"""
+import argparse
+import asyncio
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+MIGRATION_ID = "timestamps_to_bson_dates"
+
+# collection -> timestamp fields written by server.py
+TIMESTAMP_FIELDS = {
+    "users": ["created_at"],
+    "equipment": ["created_at"],
+    "teams": ["created_at"],
+    "maintenance_requests": ["created_at", "updated_at"],
+    "notifications": ["created_at"],
+}
+
+
+def parse_timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+async def migrate_collection(db, collection: str, fields, batch_size: int, dry_run: bool) -> int:
+    checkpoint = await db.migrations.find_one({"_id": MIGRATION_ID}) or {}
+    last_id = checkpoint.get("collections", {}).get(collection, {}).get("last_id")
+    if checkpoint.get("collections", {}).get(collection, {}).get("done"):
+        print(f"{collection}: already migrated")
+        return 0
+
+    query = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    projection = {field: 1 for field in fields}
+    converted = 0
+
+    while True:
+        batch_query = {**query, "_id": {"$gt": last_id}} if last_id is not None else query
+        docs = await db[collection].find(batch_query, projection).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not docs:
+            break
+
+        operations = []
+        for doc in docs:
+            update = {}
+            for field in fields:
+                value = doc.get(field)
+                if isinstance(value, str):
+                    try:
+                        update[field] = parse_timestamp(value)
+                    except ValueError:
+                        print(f"{collection}: skipping unparseable {field}={value!r} on {doc['_id']}")
+            if update:
+                operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+
+        if operations and not dry_run:
+            await db[collection].bulk_write(operations, ordered=False)
+        converted += len(operations)
+        last_id = docs[-1]["_id"]
+
+        if not dry_run:
+            await db.migrations.update_one(
+                {"_id": MIGRATION_ID},
+                {"$set": {f"collections.{collection}.last_id": last_id}},
+                upsert=True,
+            )
+        print(f"{collection}: {converted} documents converted")
+
+    if not dry_run:
+        await db.migrations.update_one(
+            {"_id": MIGRATION_ID},
+            {"$set": {f"collections.{collection}.done": True}},
+            upsert=True,
+        )
+    return converted
+
+
+async def main(batch_size: int, dry_run: bool, restart: bool):
+    load_dotenv(Path(__file__).resolve().parent.parent / "backend" / ".env")
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    db = client[os.environ["DB_NAME"]]
+    try:
+        if restart and not dry_run:
+            await db.migrations.delete_one({"_id": MIGRATION_ID})
+        total = 0
+        for collection, fields in TIMESTAMP_FIELDS.items():
+            total += await migrate_collection(db, collection, fields, batch_size, dry_run)
+        verb = "would convert" if dry_run else "converted"
+        print(f"Done: {verb} {total} documents.")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert ISO-string timestamps to BSON dates.")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="count documents without writing")
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint and rescan")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.dry_run, args.restart))
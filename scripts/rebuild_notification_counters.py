@@ -0,0 +1,49 @@
+"""Recount the per-user unread notification counters and backfill read expiry.
+
+The API keeps notification_counters current as notifications are created
+and read. Run this once to backfill counters for notifications written
+before they existed, or after notifications were inserted or edited
+directly in the database. Counters are reset and rewritten in place, so
+badges may read low for the moment it takes; pick a quiet moment.
+
+Notifications already read before expiry existed get read_at and expire_at
+from their created_at and NOTIFICATION_RETENTION_DAYS (as configured for
+the API; 0 keeps them forever), so the TTL index removes old ones as well:
+
+    python scripts/rebuild_notification_counters.py
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from indexes import ensure_indexes  # noqa: E402
+from notifications import backfill_read_expiry, rebuild_unread_counters  # noqa: E402
+
+
+async def main():
+    load_dotenv(BACKEND_DIR / ".env")
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"], tz_aware=True)
+    db = client[os.environ["DB_NAME"]]
+    # same setting and default as server.py
+    retention_days = float(os.environ.get("NOTIFICATION_RETENTION_DAYS", 30))
+    started = time.perf_counter()
+    try:
+        await ensure_indexes(db)
+        recipients = await rebuild_unread_counters(db)
+        backfilled = await backfill_read_expiry(db, retention_days)
+        print(f"Done: unread counters for {recipients} users, expiry set on {backfilled} read notifications"
+              f" in {time.perf_counter() - started:.1f}s.")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+"""Regenerate the analytics rollups from maintenance_requests.
+
+The API keeps request_rollups current as requests are created, updated,
+deleted and imported, and moves contributions when an equipment category
+change is propagated to its requests. Run this once to backfill history
+written before rollups existed, or when a drift is suspected. Rollups are
+built in a staging collection and swapped in at the end, so the analytics
+endpoint keeps answering from the old data until then; writes that land
+during the rebuild are lost on the swap, so pick a quiet moment:
+
+    python scripts/rebuild_rollups.py
+    python scripts/rebuild_rollups.py --batch-size 20000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from analytics import rebuild_rollups  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+
+
+async def main(batch_size: int):
+    load_dotenv(BACKEND_DIR / ".env")
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"], tz_aware=True)
+    db = client[os.environ["DB_NAME"]]
+    started = time.perf_counter()
+    try:
+        scanned = await rebuild_rollups(
+            db, batch_size=batch_size, progress=lambda n: print(f"{n} requests rolled up", flush=True),
+        )
+        await ensure_indexes(db)
+        rollups = await db.request_rollups.estimated_document_count()
+        print(f"Done: {scanned} requests -> {rollups} rollup documents in {time.perf_counter() - started:.1f}s.")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild request_rollups from maintenance_requests.")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
@@ -1,5 +1,7 @@
 import requests
 import os
+import json
+import uuid
 
 backend_url = os.popen("grep REACT_APP_BACKEND_URL /app/frontend/.env | cut -d '=' -f2").read().strip()
 API_URL = "http://127.0.0.1:8000/api"
@@ -84,14 +86,26 @@ equipment_data = [
 
 equipment_ids = {}
 print("\nCreating equipment...")
+# One streamed bulk import instead of a POST per asset; ids are assigned here
+# so requests below can reference them.
 for eq in equipment_data:
-    resp = requests.post(f"{API_URL}/equipment", json=eq, headers=headers)
-    if resp.status_code == 200:
-        eq_data = resp.json()
-        equipment_ids[eq["name"]] = eq_data["id"]
-        print(f"  ✓ {eq['name']}")
-    else:
-        print(f"  ✗ Failed to create {eq['name']}: {resp.text}")
+    eq["id"] = str(uuid.uuid4())
+resp = requests.post(
+    f"{API_URL}/import/equipment",
+    data="\n".join(json.dumps(eq) for eq in equipment_data),
+    headers={**headers, "Content-Type": "application/x-ndjson"},
+)
+if resp.status_code == 200:
+    report = resp.json()
+    failed_rows = {err["row"]: err["error"] for err in report["errors"]}
+    for row, eq in enumerate(equipment_data, start=1):
+        if row in failed_rows:
+            print(f"  ✗ Failed to create {eq['name']}: {failed_rows[row]}")
+        else:
+            equipment_ids[eq["name"]] = eq["id"]
+            print(f"  ✓ {eq['name']}")
+else:
+    print(f"  ✗ Equipment import failed: {resp.text}")
 
 requests_data = [
     {
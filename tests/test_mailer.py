@@ -0,0 +1,151 @@
+"""EmailDeliveryWorker against a local aiosmtpd server."""
+import asyncio
+import logging
+import socket
+import sys
+from email import message_from_bytes
+from pathlib import Path
+
+import pytest
+from aiosmtpd.controller import Controller
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from mailer import EmailDeliveryWorker, SMTPConnectionPool  # noqa: E402
+
+SENDER = "gearguard@localhost"
+
+
+class RecordingHandler:
+    """Accepts every message, answering the first `defer` DATA commands with a 451."""
+
+    def __init__(self, defer: int = 0):
+        self.defer = defer
+        self.deferred = 0
+        self.envelopes = []
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.deferred < self.defer:
+            self.deferred += 1
+            return "451 Try again later"
+        self.envelopes.append((list(envelope.rcpt_tos), message_from_bytes(envelope.content)))
+        return "250 OK"
+
+
+class RefusingHandler(RecordingHandler):
+    """Rejects every recipient with a reply that echoes the address back."""
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        return f"550 No such user <{address}>"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    controllers = []
+
+    def start(handler):
+        controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+        controller.start()
+        controllers.append(controller)
+        return controller
+
+    yield start
+    for controller in controllers:
+        controller.stop()
+
+
+def deliver(controller, messages, expected, **options) -> dict:
+    """Send `messages` through a worker until the server has `expected` envelopes; returns its stats."""
+
+    async def run():
+        pool = SMTPConnectionPool(controller.hostname, controller.port, None, None, starttls=False, size=1)
+        worker = EmailDeliveryWorker(pool, SENDER, workers=1, **options)
+        await worker.start()
+        try:
+            for recipients, subject, body in messages:
+                assert worker.enqueue(recipients, subject, body)
+            # retries sit outside the queue while they back off, so wait on what the server received
+            for _ in range(250):
+                if len(controller.handler.envelopes) >= expected:
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            await worker.stop(drain_timeout=5)
+        return worker.stats()
+
+    stats = asyncio.run(run())
+    assert len(controller.handler.envelopes) == expected
+    return stats
+
+
+def test_burst_shares_one_connection(smtp_server):
+    controller = smtp_server(RecordingHandler())
+    messages = [([f"tech{i}@plant.local"], f"Request {i} assigned", f"Request {i}") for i in range(10)]
+
+    stats = deliver(controller, messages, expected=10, linger=0.2)
+
+    assert stats["sent"] == 10
+    assert stats["batches"] == 1
+    assert stats["smtp_connects"] == 1
+    assert sorted(rcpts[0] for rcpts, _ in controller.handler.envelopes) == sorted(m[0][0] for m in messages)
+
+
+def test_identical_messages_coalesce_without_disclosing_recipients(smtp_server):
+    controller = smtp_server(RecordingHandler())
+    messages = [
+        (["alice@plant.local"], "Pump overheating", "New maintenance request"),
+        (["bob@plant.local", "carol@plant.local"], "Pump overheating", "New maintenance request"),
+        (["dave@plant.local"], "Belt worn", "New maintenance request"),
+    ]
+
+    stats = deliver(controller, messages, expected=2, linger=0.2)
+
+    assert stats["coalesced"] == 1
+    assert stats["sent"] == 2
+    by_subject = {msg["Subject"]: (rcpts, msg) for rcpts, msg in controller.handler.envelopes}
+
+    rcpts, msg = by_subject["Pump overheating"]
+    assert rcpts == ["alice@plant.local", "bob@plant.local", "carol@plant.local"]
+    headers = "".join(f"{name}: {value}\n" for name, value in msg.items())
+    for recipient in rcpts:
+        assert recipient not in headers
+
+    rcpts, msg = by_subject["Belt worn"]
+    assert rcpts == ["dave@plant.local"]
+    assert msg["To"] == "dave@plant.local"
+
+
+def test_transient_rejection_is_retried(smtp_server):
+    controller = smtp_server(RecordingHandler(defer=1))
+
+    stats = deliver(controller, [(["alice@plant.local"], "Pump overheating", "Body")], expected=1,
+                    backoff_base=0.05)
+
+    assert controller.handler.deferred == 1
+    assert stats["retried"] == 1
+    assert stats["sent"] == 1
+    assert stats["failed"] == 0
+    # the 451 marks the connection broken, so the retry opens a fresh one
+    assert stats["smtp_connects"] == 2
+
+
+def test_refused_recipients_are_not_logged(smtp_server, caplog):
+    controller = smtp_server(RefusingHandler())
+    recipients = ["alice@plant.local", "bob@plant.local"]
+
+    with caplog.at_level(logging.WARNING, logger="mailer"):
+        stats = deliver(controller, [(recipients, "Pump overheating", "Body")], expected=0)
+
+    assert stats["failed"] == 1
+    [record] = [r for r in caplog.records if r.levelno == logging.ERROR]
+    assert record.refused_recipients == 2
+    assert record.smtp_codes == [550]
+    logged = record.getMessage() + repr(vars(record))
+    for recipient in recipients:
+        assert recipient not in logged